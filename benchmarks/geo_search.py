@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+Benchmarks the geo.Grid radius and box searches FileStorage uses for
+Place against a brute-force haversine scan
+
+usage: ./benchmarks/geo_search.py [number of places]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine import geo  # noqa: E402
+
+# (latitude, longitude) of the cities the places are packed around
+cities = [(37.77, -122.42), (40.71, -74.01), (48.86, 2.35), (35.68, 139.69),
+          (-33.87, 151.21), (-23.55, -46.63), (19.43, -99.13),
+          (55.76, 37.62), (1.35, 103.82), (-17.71, 178.07)]
+
+
+def timed(func, runs):
+    """returns the result of func and its mean run time in milliseconds"""
+    start = time.perf_counter()
+    for i in range(runs):
+        result = func()
+    return result, (time.perf_counter() - start) / runs * 1000
+
+
+def main(count):
+    """runs the benchmark on count places"""
+    rand = random.Random(0)
+    points = {}
+    for i in range(count):
+        lat, lon = rand.choice(cities)
+        points["Place.{}".format(i)] = (lat + rand.gauss(0, 1),
+                                        lon + rand.gauss(0, 1))
+    grid = geo.Grid()
+    start = time.perf_counter()
+    for key, (lat, lon) in points.items():
+        grid.add(key, lat, lon)
+    build = time.perf_counter() - start
+    print("{} places, grid built in {:.2f} s".format(count, build))
+    print("{:<34} {:>8} {:>10} {:>10}".format(
+        "query", "results", "grid ms", "scan ms"))
+
+    def scan_near(lat, lon, km):
+        """the brute-force radius search"""
+        return sorted((d, key) for d, key in
+                      ((geo.haversine(lat, lon, plat, plon), key)
+                       for key, (plat, plon) in points.items()) if d <= km)
+
+    def scan_within(south, west, north, east):
+        """the brute-force box search"""
+        lat, lon = (south + north) / 2, (west + east) / 2
+        return sorted((geo.haversine(lat, lon, plat, plon), key)
+                      for key, (plat, plon) in points.items()
+                      if geo.in_box(plat, plon, south, west, north, east))
+
+    searches = [("near SF, 1 km", "near", (37.77, -122.42, 1)),
+                ("near SF, 5 km", "near", (37.77, -122.42, 5)),
+                ("near Paris, 20 km", "near", (48.86, 2.35, 20)),
+                ("near Fiji, 50 km (antimeridian)", "near",
+                 (-17.71, 179.9, 50)),
+                ("box around Tokyo, 0.2 degrees", "within",
+                 (35.58, 139.59, 35.78, 139.79))]
+    for name, kind, args in searches:
+        found, grid_ms = timed(lambda: getattr(grid, kind)(*args), 20)
+        scan = scan_near if kind == "near" else scan_within
+        expected, scan_ms = timed(lambda: scan(*args), 1)
+        if found != expected:
+            raise AssertionError("{}: grid and scan disagree".format(name))
+        print("{:<34} {:>8} {:>10.2f} {:>10.2f}".format(name, len(found),
+                                                        grid_ms, scan_ms))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Benchmarks inserting rows keyed by random (uuid4) and time-ordered (uuid7)
+ids, as VARCHAR strings and as BINARY(16), into a SQLite WITHOUT ROWID
+table (a clustered B-tree like InnoDB's primary key) with a cache smaller
+than the table, and into a sorted in-memory list of ids
+
+usage: ./benchmarks/id_inserts.py [number of rows]
+"""
+
+import bisect
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine import ids  # noqa: E402
+
+# rows per transaction
+batch = 1000
+
+
+def insert_rows(path, keys):
+    """inserts a row per key into a new table of the database at path,
+    returns the rows per second and the size of the file in MiB"""
+    kind = "BLOB" if type(keys[0]) is bytes else "VARCHAR(60)"
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA cache_size = -4096")
+    db.execute("CREATE TABLE places (id {} PRIMARY KEY, name VARCHAR(128),"
+               " price_by_night INTEGER) WITHOUT ROWID".format(kind))
+    start = time.perf_counter()
+    for i in range(0, len(keys), batch):
+        with db:
+            db.executemany("INSERT INTO places VALUES (?, ?, ?)",
+                           [(key, "Lovely home number {}".format(i), 100)
+                            for key in keys[i:i + batch]])
+    elapsed = time.perf_counter() - start
+    db.close()
+    return len(keys) / elapsed, os.path.getsize(path) / 2 ** 20
+
+
+def insort_keys(keys):
+    """inserts keys one by one into a sorted list, returns the keys per
+    second"""
+    start = time.perf_counter()
+    index = []
+    for key in keys:
+        bisect.insort(index, key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def main(count):
+    """runs the benchmark on count rows"""
+    directory = tempfile.mkdtemp()
+    print("{} rows".format(count))
+    print("{:<20} {:>14} {:>10} {:>16}".format("key", "SQLite rows/s",
+                                               "file MiB", "sorted list/s"))
+    for name in ("uuid4", "uuid7"):
+        made = [ids.generators[name]() for i in range(count)]
+        for binary in (False, True):
+            keys = [uuid.UUID(key).bytes for key in made] if binary else made
+            path = os.path.join(directory, "{}{}.db".format(name, binary))
+            rate, size = insert_rows(path, keys)
+            os.remove(path)
+            print("{:<20} {:>14,.0f} {:>10.1f} {:>16,.0f}".format(
+                name + (" BINARY(16)" if binary else " VARCHAR"), rate, size,
+                insort_keys(keys)))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300000)
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""
+Benchmarks the memory FileStorage.reload() takes for a synthetic dataset
+of states, cities, users, places and reviews, with the foreign key strings
+of the loaded objects interned and with interning turned off, each run in
+a fresh interpreter
+
+usage: ./benchmarks/model_interning.py [number of reviews]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+# reloads the file, printing the number of objects and the bytes reload()
+# allocated, traced by tracemalloc or, untraced, as the growth of the
+# resident set
+child = """
+import sys, tracemalloc
+sys.path.insert(0, sys.argv[1])
+from models import base_model
+from models.engine.file_storage import FileStorage
+if sys.argv[3] == "off":
+    base_model.interned.clear()
+traced = sys.argv[4] == "traced"
+
+
+def used():
+    if traced:
+        return tracemalloc.get_traced_memory()[0]
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+FileStorage._FileStorage__file_path = sys.argv[2]
+FileStorage._FileStorage__objects = {}
+if traced:
+    tracemalloc.start()
+start = used()
+storage = FileStorage()
+storage.reload()
+print(len(storage.all()), used() - start)
+"""
+
+
+def write_dataset(path, count):
+    """writes a file.json of count reviews, count / 10 places, count / 50
+    users, count / 100 cities and 50 states"""
+    stamp = "2017-09-28T21:03:54.052298"
+    records = {}
+
+    def add(cls, **attrs):
+        """adds a record of the class named cls, returns its id"""
+        attrs.update(id=str(uuid.uuid4()), created_at=stamp,
+                     updated_at=stamp, __class__=cls)
+        records[cls + "." + attrs["id"]] = attrs
+        return attrs["id"]
+    states = [add("State", name="State {}".format(i)) for i in range(50)]
+    cities = [add("City", name="City {}".format(i), state_id=states[i % 50])
+              for i in range(max(1, count // 100))]
+    users = [add("User", email="{}@hbnb.io".format(i), password="pwd")
+             for i in range(max(1, count // 50))]
+    places = [add("Place", name="Place {}".format(i),
+                  city_id=cities[i % len(cities)],
+                  user_id=users[i % len(users)], price_by_night=100)
+              for i in range(max(1, count // 10))]
+    for i in range(count):
+        add("Review", text="Great stay", place_id=places[i % len(places)],
+            user_id=users[(i * 7) % len(users)])
+    with open(path, "w") as f:
+        json.dump(records, f)
+    return len(records)
+
+
+def measure(path, mode):
+    """returns the bytes the child reports, traced and untraced"""
+    env = dict(os.environ)
+    env.pop("HBNB_TYPE_STORAGE", None)
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    sizes = []
+    for how in ("traced", "untraced"):
+        out = subprocess.run([sys.executable, "-c", child, root, path, mode,
+                              how], env=env, cwd=root, check=True,
+                             stdout=subprocess.PIPE).stdout.split()
+        sizes.append(int(out[-1]))
+    return sizes
+
+
+def main(count):
+    """runs the benchmark on count reviews"""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "file.json")
+    objects = write_dataset(path, count)
+    off = measure(path, "off")
+    on = measure(path, "on")
+    os.remove(path)
+    os.rmdir(directory)
+    print("{} objects reloaded".format(objects))
+    print("{:<22} {:>12} {:>12} {:>8}".format("", "not interned", "interned",
+                                              "saved"))
+    for name, before, after in [("MiB allocated", off[0] / 2 ** 20,
+                                 on[0] / 2 ** 20),
+                                ("bytes per object", off[0] / objects,
+                                 on[0] / objects),
+                                ("resident set MiB", off[1] / 2 ** 20,
+                                 on[1] / 2 ** 20)]:
+        print("{:<22} {:>12.1f} {:>12.1f} {:>7.0%}".format(
+            name, before, after, 1 - after / before))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""
+Benchmarks the memory taken by file-mode reviews and places built the way
+reload() builds them, from decoded records with from_dicts, as plain
+objects and with HBNB_FILE_COMPACT=1 (__slots__), each mode measured in a
+fresh interpreter since the models are built at import
+
+usage: ./benchmarks/model_memory.py [number of objects]
+"""
+
+import os
+import subprocess
+import sys
+
+# measures the objects made by the child interpreter, printing
+# "<bytes per review> <bytes per place> <peak RSS in MiB>"
+child = """
+import json, resource, sys, tracemalloc, uuid
+sys.path.insert(0, sys.argv[2])
+from models.place import Place
+from models.review import Review
+count = int(sys.argv[1])
+users = [str(uuid.uuid4()) for i in range(100)]
+places = [str(uuid.uuid4()) for i in range(1000)]
+reviews = json.dumps([Review(place_id=places[i % 1000],
+                             user_id=users[i % 100],
+                             text="Great stay, would come back").to_dict()
+                      for i in range(count)])
+homes = json.dumps([Place(city_id=places[i % 1000], user_id=users[i % 100],
+                          name="Home", number_rooms=2, max_guest=4,
+                          price_by_night=100, amenity_ids=[]).to_dict()
+                    for i in range(count // 10)])
+sizes, built = [], []
+tracemalloc.start()
+for cls, data, number in ((Review, reviews, count),
+                          (Place, homes, count // 10)):
+    start = tracemalloc.get_traced_memory()[0]
+    records = json.loads(data)
+    built.append(cls.from_dicts(records))
+    del records
+    sizes.append((tracemalloc.get_traced_memory()[0] - start) / number)
+tracemalloc.stop()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(sizes[0], sizes[1], rss)
+"""
+
+
+def measure(count, compact):
+    """returns the sizes printed by child, in compact mode or not"""
+    env = dict(os.environ, HBNB_FILE_COMPACT="1" if compact else "0")
+    env.pop("HBNB_TYPE_STORAGE", None)
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    out = subprocess.run([sys.executable, "-c", child, str(count), root],
+                         env=env, cwd=root, check=True,
+                         stdout=subprocess.PIPE).stdout.split()
+    return [float(value) for value in out[-3:]]
+
+
+def main(count):
+    """runs the benchmark on count reviews and count / 10 places"""
+    plain = measure(count, False)
+    compact = measure(count, True)
+    print("{} reviews, {} places".format(count, count // 10))
+    print("{:<22} {:>10} {:>10} {:>8}".format("", "plain", "compact", "saved"))
+    names = ["bytes per review", "bytes per place", "peak RSS MiB"]
+    for name, before, after in zip(names, plain, compact):
+        print("{:<22} {:>10.0f} {:>10.0f} {:>7.0%}".format(
+            name, before, after, 1 - after / before))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
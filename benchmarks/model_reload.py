@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+Benchmarks building file-mode objects from stored records with
+BaseModel.from_dicts against cls(**record), alone and as part of
+FileStorage.reload() with the json and binary codecs
+
+usage: ./benchmarks/model_reload.py [number of objects]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.pop("HBNB_TYPE_STORAGE", None)
+from models.base_model import BaseModel  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def through_init(cls, records):
+    """builds the records like reload() did before from_dicts"""
+    return [cls(**record) for record in records]
+
+
+def timed(func, runs=3):
+    """returns the best run time of func in seconds"""
+    best = None
+    for i in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def reload(storage):
+    """reloads storage from scratch"""
+    FileStorage._FileStorage__objects = {}
+    storage.reload()
+
+
+def main(count):
+    """runs the benchmark on count objects, nine reviews per place"""
+    objs = [Place(name="Home {}".format(i), city_id="c", user_id="u",
+                  number_rooms=2, price_by_night=100, amenity_ids=[])
+            for i in range(count // 10)]
+    objs += [Review(place_id=objs[i % len(objs)].id, user_id="u",
+                    text="Great stay, would come back")
+             for i in range(count - len(objs))]
+    records = {Place: [], Review: []}
+    for obj in objs:
+        records[type(obj)].append(obj.to_dict())
+    fast = BaseModel.from_dicts.__func__
+    print("{} objects".format(count))
+    print("{:<26} {:>14} {:>14}".format("objects per second", "cls(**record)",
+                                        "from_dicts"))
+    rates = []
+    for func in (through_init, fast):
+        seconds = timed(lambda: [func(cls, group) for cls, group in
+                                 records.items()])
+        rates.append(count / seconds)
+    print("{:<26} {:>14,.0f} {:>14,.0f}".format("constructors", *rates))
+    storage = FileStorage()
+    directory = tempfile.mkdtemp()
+    for codec in ("json", "binary"):
+        path = os.path.join(directory, "bench." + codec)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__codec = codec
+        FileStorage._FileStorage__objects = {}
+        for obj in objs:
+            storage.new(obj)
+        storage.save()
+        rates = []
+        for func in (through_init, fast):
+            BaseModel.from_dicts = classmethod(func)
+            rates.append(count / timed(lambda: reload(storage)))
+            if len(storage.all()) != count:
+                raise AssertionError("reload lost objects")
+        BaseModel.from_dicts = classmethod(fast)
+        print("{:<26} {:>14,.0f} {:>14,.0f}".format(
+            "reload() " + codec, *rates))
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
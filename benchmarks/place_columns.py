@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Benchmarks the price per city and guests per state aggregates computed
+from storage.columns(Place) against the same loops over
+storage.all(Place); needs NumPy
+
+usage: ./benchmarks/place_columns.py [number of places]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.pop("HBNB_TYPE_STORAGE", None)
+from models.city import City  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.state import State  # noqa: E402
+
+
+def timed(func, runs):
+    """returns the result of func and its mean run time in milliseconds"""
+    start = time.perf_counter()
+    for i in range(runs):
+        result = func()
+    return result, (time.perf_counter() - start) / runs * 1000
+
+
+def main(count):
+    """runs the benchmark on count places"""
+    rand = random.Random(0)
+    storage = FileStorage()
+    FileStorage._FileStorage__objects = {}
+    states = [State(name="State {}".format(i)) for i in range(50)]
+    cities = [City(name="City {}".format(i), state_id=rand.choice(states).id)
+              for i in range(2000)]
+    for obj in states + cities:
+        storage.new(obj)
+    for i in range(count):
+        storage.new(Place(name=str(i), city_id=rand.choice(cities).id,
+                          price_by_night=rand.randint(20, 500),
+                          max_guest=rand.randint(1, 12)))
+    city_states = {city.id: city.state_id for city in cities}
+
+    def loop_prices():
+        """the mean price per city, object by object"""
+        totals = {}
+        for place in storage.all(Place).values():
+            total = totals.setdefault(place.city_id, [0, 0])
+            total[0] += place.price_by_night
+            total[1] += 1
+        return {city: s / n for city, (s, n) in totals.items()}
+
+    def loop_guests():
+        """the guests of places under 100 per state, object by object"""
+        totals = {}
+        for place in storage.all(Place).values():
+            if place.price_by_night < 100:
+                state = city_states[place.city_id]
+                totals[state] = totals.get(state, 0) + place.max_guest
+        return totals
+
+    def column_prices():
+        """the mean price per city, from the columns"""
+        return storage.columns(Place).group("city_id", "price_by_night",
+                                            "mean")
+
+    def column_guests():
+        """the guests of places under 100 per state, from the columns"""
+        return storage.columns(Place).filter(price_by_night__lt=100).group(
+            "state_id", "max_guest", "sum")
+
+    snapshot, build_ms = timed(lambda: storage.columns(Place), 1)
+    print("{} places, columns built in {:.0f} ms".format(count, build_ms))
+    print("{:<34} {:>10} {:>10}".format("aggregate", "loop ms", "columns ms"))
+    for name, loop, vector in [("mean price per city", loop_prices,
+                                column_prices),
+                               ("guests under 100 per state", loop_guests,
+                                column_guests)]:
+        expected, loop_ms = timed(loop, 3)
+        found, vector_ms = timed(vector, 20)
+        if found.keys() != expected.keys() or any(
+                abs(found[k] - expected[k]) > 1e-6 for k in expected):
+            raise AssertionError("{}: loop and columns disagree".format(name))
+        print("{:<34} {:>10.1f} {:>10.2f}".format(name, loop_ms, vector_ms))
+    places = list(storage.all(Place).values())
+
+    def update():
+        """reprices a hundred places, then takes a new snapshot"""
+        for place in rand.sample(places, 100):
+            place.price_by_night = rand.randint(20, 500)
+        return storage.columns(Place)
+    found, update_ms = timed(update, 5)
+    print("{:<34} {:>10} {:>10.2f}".format("100 updates + new snapshot", "",
+                                           update_ms))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
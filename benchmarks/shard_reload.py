@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.reload() of a sharded dataset read serially and
+with worker processes decoding the shards, and the time the parent spends
+loading what a worker sends back for one shard: the built objects, the
+(key, record) pairs, or the grouped records read_shard returns
+
+usage: ./benchmarks/shard_reload.py [number of objects] [workers]
+"""
+
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.pop("HBNB_TYPE_STORAGE", None)
+from models.engine import file_storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def timed(func, runs=3):
+    """returns the best run time of func in seconds"""
+    best = None
+    for i in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def reload(storage, workers):
+    """reloads every shard from scratch with workers processes"""
+    FileStorage._FileStorage__workers = workers
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__shard_stamps = {}
+    storage.reload()
+
+
+def main(count, workers):
+    """runs the benchmark on count objects, nine reviews per place, in
+    eight shards per class"""
+    directory = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(directory, "bench")
+    FileStorage._FileStorage__shards = 8
+    FileStorage._FileStorage__parallel_min = 0
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage()
+    places = [Place(name="Home {}".format(i), city_id="c", user_id="u",
+                    number_rooms=2, price_by_night=100, amenity_ids=[])
+              for i in range(count // 10)]
+    for place in places:
+        storage.new(place)
+    for i in range(count - len(places)):
+        storage.new(Review(place_id=places[i % len(places)].id, user_id="u",
+                           text="Great stay, would come back"))
+    storage.save()
+    print("{} objects, {} shards, {} cores".format(
+        count, len(os.listdir(directory + "/bench.d")) - 1, os.cpu_count()))
+    serial = timed(lambda: reload(storage, 0))
+    parallel = timed(lambda: reload(storage, workers))
+    if len(storage.all()) != count:
+        raise AssertionError("reload lost objects")
+    print("{:<32} {:>10}".format("reload() objects per second", ""))
+    print("{:<32} {:>10,.0f}".format("serial", count / serial))
+    print("{:<32} {:>10,.0f}".format("{} workers".format(workers),
+                                     count / parallel))
+    path = os.path.join(directory, "bench.d", "Review.0")
+    pairs = list(file_storage.read_records(path))
+    payloads = [("objects", list(file_storage.build(iter(pairs)))),
+                ("(key, record) pairs", pairs),
+                ("read_shard groups", file_storage.read_shard(path))]
+    print("{:<32} {:>10} {:>8}".format("one shard sent back as", "MiB",
+                                       "load ms"))
+    for name, payload in payloads:
+        data = pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)
+        print("{:<32} {:>10.1f} {:>8.0f}".format(
+            name, len(data) / 2 ** 20,
+            timed(lambda: pickle.loads(data)) * 1000))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
@@ -0,0 +1,68 @@
+-- Converts the ids of a database made without HBNB_MYSQL_BINARY_IDS from
+-- VARCHAR(60) UUID strings to the BINARY(16) columns DBStorage uses with
+-- HBNB_MYSQL_BINARY_IDS=1: create_all never changes the type of a column
+-- that already exists.
+-- Every id must be a UUID string; stop the application, back the database
+-- up, then run it once, e.g.
+--   cat migrate_mysql_binary_ids.sql | mysql -uroot -p hbnb_dev_db
+-- Each column first becomes VARBINARY so that it keeps its bytes, then
+-- takes the 16 bytes of its hex digits, then becomes BINARY(16). Rows
+-- already converted are 16 bytes long and left alone.
+
+SET FOREIGN_KEY_CHECKS = 0;
+
+ALTER TABLE states MODIFY id VARBINARY(60) NOT NULL;
+UPDATE states SET id = UNHEX(REPLACE(id, '-', '')) WHERE LENGTH(id) = 36;
+ALTER TABLE states MODIFY id BINARY(16) NOT NULL;
+
+ALTER TABLE users MODIFY id VARBINARY(60) NOT NULL;
+UPDATE users SET id = UNHEX(REPLACE(id, '-', '')) WHERE LENGTH(id) = 36;
+ALTER TABLE users MODIFY id BINARY(16) NOT NULL;
+
+ALTER TABLE amenities MODIFY id VARBINARY(60) NOT NULL;
+UPDATE amenities SET id = UNHEX(REPLACE(id, '-', ''))
+    WHERE LENGTH(id) = 36;
+ALTER TABLE amenities MODIFY id BINARY(16) NOT NULL;
+
+ALTER TABLE cities MODIFY id VARBINARY(60) NOT NULL,
+    MODIFY state_id VARBINARY(60) NOT NULL;
+UPDATE cities SET id = UNHEX(REPLACE(id, '-', '')) WHERE LENGTH(id) = 36;
+UPDATE cities SET state_id = UNHEX(REPLACE(state_id, '-', ''))
+    WHERE LENGTH(state_id) = 36;
+ALTER TABLE cities MODIFY id BINARY(16) NOT NULL,
+    MODIFY state_id BINARY(16) NOT NULL;
+
+ALTER TABLE places MODIFY id VARBINARY(60) NOT NULL,
+    MODIFY city_id VARBINARY(60) NOT NULL,
+    MODIFY user_id VARBINARY(60) NOT NULL;
+UPDATE places SET id = UNHEX(REPLACE(id, '-', '')) WHERE LENGTH(id) = 36;
+UPDATE places SET city_id = UNHEX(REPLACE(city_id, '-', ''))
+    WHERE LENGTH(city_id) = 36;
+UPDATE places SET user_id = UNHEX(REPLACE(user_id, '-', ''))
+    WHERE LENGTH(user_id) = 36;
+ALTER TABLE places MODIFY id BINARY(16) NOT NULL,
+    MODIFY city_id BINARY(16) NOT NULL,
+    MODIFY user_id BINARY(16) NOT NULL;
+
+ALTER TABLE reviews MODIFY id VARBINARY(60) NOT NULL,
+    MODIFY place_id VARBINARY(60) NOT NULL,
+    MODIFY user_id VARBINARY(60) NOT NULL;
+UPDATE reviews SET id = UNHEX(REPLACE(id, '-', '')) WHERE LENGTH(id) = 36;
+UPDATE reviews SET place_id = UNHEX(REPLACE(place_id, '-', ''))
+    WHERE LENGTH(place_id) = 36;
+UPDATE reviews SET user_id = UNHEX(REPLACE(user_id, '-', ''))
+    WHERE LENGTH(user_id) = 36;
+ALTER TABLE reviews MODIFY id BINARY(16) NOT NULL,
+    MODIFY place_id BINARY(16) NOT NULL,
+    MODIFY user_id BINARY(16) NOT NULL;
+
+ALTER TABLE place_amenity MODIFY place_id VARBINARY(60) NOT NULL,
+    MODIFY amenity_id VARBINARY(60) NOT NULL;
+UPDATE place_amenity SET place_id = UNHEX(REPLACE(place_id, '-', ''))
+    WHERE LENGTH(place_id) = 36;
+UPDATE place_amenity SET amenity_id = UNHEX(REPLACE(amenity_id, '-', ''))
+    WHERE LENGTH(amenity_id) = 36;
+ALTER TABLE place_amenity MODIFY place_id BINARY(16) NOT NULL,
+    MODIFY amenity_id BINARY(16) NOT NULL;
+
+SET FOREIGN_KEY_CHECKS = 1;
@@ -0,0 +1,20 @@
+-- Adds the indexes DBStorage declares to a database whose tables were
+-- created before them: create_all only creates missing tables, so it never
+-- adds an index to a table that already exists.
+-- Run it once against each database, e.g.
+--   cat migrate_mysql_indexes.sql | mysql -uroot -p hbnb_dev_db
+-- A statement failing with "Duplicate key name" means that index is
+-- already there.
+
+-- the range filters of search() and query()
+CREATE INDEX ix_places_number_rooms ON places (number_rooms);
+CREATE INDEX ix_places_number_bathrooms ON places (number_bathrooms);
+CREATE INDEX ix_places_max_guest ON places (max_guest);
+CREATE INDEX ix_places_price_by_night ON places (price_by_night);
+
+-- the bounding box of near() and within()
+CREATE INDEX ix_places_location ON places (latitude, longitude);
+
+-- the MATCH ... AGAINST of search()
+ALTER TABLE places ADD FULLTEXT INDEX ix_places_text (name, description);
+ALTER TABLE reviews ADD FULLTEXT INDEX ix_reviews_text (text);
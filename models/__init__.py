@@ -7,6 +7,8 @@ from os import getenv
 
 
 storage_t = getenv("HBNB_TYPE_STORAGE")
+# whether file-mode models keep their attributes in __slots__
+compact = storage_t != "db" and getenv("HBNB_FILE_COMPACT") == "1"
 
 if storage_t == "db":
     from models.engine.db_storage import DBStorage
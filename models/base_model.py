@@ -5,13 +5,115 @@ class BaseModel
 
 from datetime import datetime
 import models
+from models.engine import ids
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, DateTime
+import sys
+from sqlalchemy import Column, DateTime
 from sqlalchemy.ext.declarative import declarative_base
-import uuid
+import weakref
 
 time = "%Y-%m-%dT%H:%M:%S.%f"
+# instances whose attributes changed since storage last serialized them
+dirty = weakref.WeakSet()
+# attributes of instances before their first change in the open storage
+# batch, None when no batch is open
+snapshots = None
+# attribute names storage keeps indexes on, and the instances with one of
+# them changed since storage last indexed them
+watched = set()
+moved = weakref.WeakSet()
+# attribute names whose list values are kept as Tracked lists, so that
+# changing one in place marks its instance as setting the attribute does
+tracked = set()
+# attribute names whose string values, or the strings in their list values,
+# are interned on load and assignment, so that an id many instances refer
+# to is stored once
+interned = set()
+# file-mode instances -> [to_dict() result, str() result], either None until
+# computed; an instance is dropped whenever one of its attributes is set or
+# deleted, and never cached while it holds lists or dicts, which change in
+# place
+serialized = weakref.WeakKeyDictionary()
+
+
+class Compact(type):
+    """metaclass of the compact file-mode models: the attribute defaults a
+    class body declares become __slots__, and their values defaults read
+    back while a slot is unset"""
+    def __new__(mcls, name, bases, namespace):
+        """makes the class, with slots for its declared defaults"""
+        defaults = {key: value for key, value in namespace.items()
+                    if not key.startswith("__") and
+                    type(value) in (str, int, float, bool, list)}
+        for key in defaults:
+            del namespace[key]
+        namespace["__slots__"] = tuple(namespace.get("__slots__", ())) + \
+            tuple(defaults)
+        cls = super().__new__(mcls, name, bases, namespace)
+        cls.__defaults = {}
+        for base in reversed(cls.__mro__[1:]):
+            cls.__defaults.update(getattr(base, "_Compact__defaults", {}))
+        cls.__defaults.update(defaults)
+        return cls
+
+    def default(cls, name):
+        """returns the default of the attribute name, raising
+        AttributeError if there is none"""
+        try:
+            return cls.__defaults[name]
+        except KeyError:
+            raise AttributeError("'{}' object has no attribute '{}'"
+                                 .format(cls.__name__, name)) from None
+
+
+class Tracked(list):
+    """list value of a tracked attribute, which marks its instance dirty
+    and moved before any change in place"""
+    __slots__ = ("owner", "name")
+
+    def __init__(self, values, owner, name):
+        """makes a copy of values held by the name attribute of owner"""
+        super().__init__(values)
+        self.owner = weakref.ref(owner)
+        self.name = name
+
+    def __reduce_ex__(self, protocol):
+        """pickles and copies as a plain list"""
+        return list, (list(self),)
+
+    def changing(self):
+        """marks the instance changed, snapshotting it first in an open
+        batch, unless it no longer holds this list"""
+        obj = self.owner()
+        if obj is None or getattr(obj, self.name, None) is not self:
+            return
+        if snapshots is not None and obj not in snapshots:
+            attrs = attributes(obj)
+            attrs[self.name] = Tracked(self, obj, self.name)
+            snapshots[obj] = attrs
+        dirty.add(obj)
+        serialized.pop(obj, None)
+        if self.name in watched:
+            moved.add(obj)
+
+
+def changing(method):
+    """returns the list method as a Tracked method calling changing()
+    first"""
+    def change(self, *args, **kwargs):
+        self.changing()
+        return method(self, *args, **kwargs)
+    change.__name__ = method.__name__
+    change.__doc__ = method.__doc__
+    return change
+
+
+for name in ("append", "extend", "insert", "remove", "pop", "clear",
+             "sort", "reverse", "__setitem__", "__delitem__", "__iadd__",
+             "__imul__"):
+    setattr(Tracked, name, changing(getattr(list, name)))
+
 
 if models.storage_t == "db":
     Base = declarative_base()
@@ -19,38 +121,311 @@ else:
     Base = object
 
 
-class BaseModel:
+def intern(value):
+    """returns value interned if it is a string, or value with the strings
+    it holds interned in place if it is a list"""
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) is list:
+        for i, item in enumerate(value):
+            if type(item) is str:
+                value[i] = sys.intern(item)
+    return value
+
+
+def track(obj, name, value):
+    """returns value, as a Tracked list held by the name attribute of obj
+    if it is a list not held there yet"""
+    if not isinstance(value, list) or type(value) is Tracked and \
+       value.owner() is obj and value.name == name:
+        return value
+    return Tracked(value, obj, name)
+
+
+def trusted(record):
+    """returns the created_at and updated_at datetimes of record if it
+    holds them, as datetimes or ISO strings, along with an id, or None if
+    it must go through __init__"""
+    if record.get("id") is None:
+        return None
+    dates = []
+    for name in ("created_at", "updated_at"):
+        value = record.get(name)
+        if type(value) is str and value:
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        elif type(value) is not datetime:
+            return None
+        dates.append(value)
+    return dates
+
+
+def intern_values(attrs):
+    """interns the values of the interned attribute names in the dictionary
+    attrs, returns attrs"""
+    for name in interned:
+        if name in attrs:
+            attrs[name] = intern(attrs[name])
+    return attrs
+
+
+def attributes(obj):
+    """returns a new dictionary of the instance attributes of obj"""
+    if models.compact:
+        return obj._BaseModel__attributes()
+    return obj.__dict__.copy()
+
+
+def uncached_dict(obj):
+    """returns obj.to_dict() without caching it, for storage, which keeps
+    its own encoding of obj"""
+    forms = serialized.get(obj)
+    if forms is not None and forms[0] is not None:
+        return dict(forms[0])
+    return obj._BaseModel__to_dict()
+
+
+def cacheable(attrs):
+    """tells whether the forms of an instance with the attributes attrs
+    can be cached: they hold no list or dict"""
+    for value in attrs.values():
+        if type(value) in (list, dict):
+            return False
+    return True
+
+
+def restore(obj, attrs):
+    """replaces the instance attributes of obj by attrs, without marking it
+    changed"""
+    serialized.pop(obj, None)
+    if models.compact:
+        obj._BaseModel__restore(attrs)
+        return
+    obj.__dict__.clear()
+    obj.__dict__.update(attrs)
+
+
+class BaseModel(metaclass=Compact if models.compact else type):
     """The BaseModel class from which future classes will be derived"""
     if models.storage_t == "db":
-        id = Column(String(60), primary_key=True)
+        id = Column(ids.key_type(), primary_key=True)
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow)
+    elif models.compact:
+        # attributes that are not slots go to the __extra dictionary, made
+        # on first use
+        __slots__ = ("id", "created_at", "updated_at", "__extra",
+                     "__weakref__")
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
         if kwargs:
             for key, value in kwargs.items():
                 if key != "__class__":
-                    setattr(self, key, value)
+                    self.__assign(key, value)
             if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
-            else:
-                self.created_at = datetime.utcnow()
+                self.__assign("created_at",
+                              datetime.strptime(kwargs["created_at"], time))
+            elif type(kwargs.get("created_at", None)) is not datetime:
+                self.__assign("created_at", datetime.utcnow())
             if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
-            else:
-                self.updated_at = datetime.utcnow()
+                self.__assign("updated_at",
+                              datetime.strptime(kwargs["updated_at"], time))
+            elif type(kwargs.get("updated_at", None)) is not datetime:
+                self.__assign("updated_at", datetime.utcnow())
             if kwargs.get("id", None) is None:
-                self.id = str(uuid.uuid4())
+                self.__assign("id", ids.generate())
+        else:
+            self.__assign("id", ids.generate())
+            self.__assign("created_at", datetime.utcnow())
+            self.__assign("updated_at", self.created_at)
+
+    @classmethod
+    def from_dict(cls, record):
+        """returns the instance stored as record, a to_dict() dictionary
+        like cls(**record) takes"""
+        return cls.from_dicts([record])[0]
+
+    @classmethod
+    def from_dicts(cls, records):
+        """returns the list of the instances stored as records; records
+        holding an id and readable, non-empty created_at and updated_at
+        strings (or datetimes) skip __init__, the others go through it"""
+        if models.storage_t == "db":
+            return [cls(**record) for record in records]
+        new = cls.__new__
+        put = object.__setattr__
+        compact = models.compact
+        objs = []
+        for record in records:
+            dates = trusted(record)
+            if dates is None:
+                objs.append(cls(**record))
+                continue
+            obj = new(cls)
+            attrs = dict(record)
+            attrs.pop("__class__", None)
+            attrs["created_at"], attrs["updated_at"] = dates
+            intern_values(attrs)
+            for name in tracked:
+                if name in attrs:
+                    attrs[name] = track(obj, name, attrs[name])
+            if compact:
+                obj.__restore(attrs)
+            else:
+                for name, value in attrs.items():
+                    put(obj, name, value)
+            objs.append(obj)
+        return objs
+
+    def __assign(self, name, value):
+        """sets an attribute of a new instance, which is neither dirty nor
+        moved: storage has not serialized nor indexed it yet"""
+        if name in interned:
+            value = intern(value)
+        if name in tracked:
+            value = track(self, name, value)
+        if models.compact:
+            self.__set(name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def __setattr__(self, name, value):
+        """sets an attribute and marks the instance as dirty"""
+        if snapshots is not None and self not in snapshots:
+            snapshots[self] = attributes(self)
+        if name in interned:
+            value = intern(value)
+        if name in tracked:
+            value = track(self, name, value)
+        if models.compact:
+            self.__set(name, value)
+        else:
+            super().__setattr__(name, value)
+        dirty.add(self)
+        serialized.pop(self, None)
+        if name in watched:
+            moved.add(self)
+
+    def __delattr__(self, name):
+        """deletes an attribute and marks the instance as dirty"""
+        if snapshots is not None and self not in snapshots:
+            snapshots[self] = attributes(self)
+        if models.compact:
+            self.__delete(name)
         else:
-            self.id = str(uuid.uuid4())
-            self.created_at = datetime.utcnow()
-            self.updated_at = self.created_at
+            super().__delattr__(name)
+        dirty.add(self)
+        serialized.pop(self, None)
+        if name in watched:
+            moved.add(self)
+
+    if models.compact:
+        def __getattr__(self, name):
+            """returns the extra attribute name, or the default of an unset
+            one"""
+            if name != "_BaseModel__extra":
+                extra = self.__extra
+                if extra is not None and name in extra:
+                    return extra[name]
+                if name[:2] != "__" or name[-2:] != "__":
+                    return type(self).default(name)
+            if name == "_BaseModel__extra":
+                return None
+            raise AttributeError(name)
+
+        def __set(self, name, value):
+            """sets the slot name, or the extra attribute name if there is
+            no such slot"""
+            try:
+                object.__setattr__(self, name, value)
+            except AttributeError:
+                if self.__extra is None:
+                    object.__setattr__(self, "_BaseModel__extra", {})
+                self.__extra[name] = value
+
+        def __delete(self, name):
+            """deletes the slot or the extra attribute name"""
+            extra = self.__extra
+            if extra is not None and name in extra:
+                del extra[name]
+            else:
+                object.__delattr__(self, name)
+
+        def __slots(self):
+            """yields the slot names of the instance, base classes first"""
+            for cls in reversed(type(self).__mro__):
+                for name in cls.__dict__.get("__slots__", ()):
+                    if name not in ("__weakref__", "__extra"):
+                        yield name
+
+        def __attributes(self):
+            """returns a new dictionary of the set slots and the extra
+            attributes"""
+            attrs = {}
+            for name in self.__slots():
+                try:
+                    attrs[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    pass
+            if self.__extra is not None:
+                attrs.update(self.__extra)
+            return attrs
+
+        def __restore(self, attrs):
+            """replaces the set slots and the extra attributes by attrs"""
+            for name in self.__slots():
+                if name in attrs:
+                    object.__setattr__(self, name, attrs[name])
+                else:
+                    try:
+                        object.__delattr__(self, name)
+                    except AttributeError:
+                        pass
+            extra = {name: value for name, value in attrs.items()
+                     if not hasattr(type(self), name)}
+            object.__setattr__(self, "_BaseModel__extra", extra or None)
+
+        @property
+        def __dict__(self):
+            """returns a new dictionary of the attributes, for code reading
+            vars(); changing it does not change the instance"""
+            return self.__attributes()
+
+        def __getstate__(self):
+            """returns the attributes pickle saves"""
+            return self.__attributes()
+
+        def __setstate__(self, state):
+            """restores the attributes pickle saved"""
+            self.__restore(state)
+
+    def __forms(self):
+        """returns the list of the cached to_dict() and str() results of
+        the instance, or None in DB mode, where SQLAlchemy sets attributes
+        behind __setattr__"""
+        if models.storage_t == "db":
+            return None
+        forms = serialized.get(self)
+        if forms is None:
+            forms = serialized[self] = [None, None]
+        return forms
 
     def __str__(self):
         """String representation of the BaseModel class"""
-        return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
-                                         self.__dict__)
+        forms = serialized.get(self)
+        if forms is not None and forms[1] is not None:
+            return forms[1]
+        attrs = attributes(self)
+        string = "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
+                                           attrs)
+        if cacheable(attrs):
+            forms = self.__forms()
+            if forms is not None:
+                forms[1] = string
+        return string
 
     def save(self):
         """updates the attribute 'updated_at' with the current datetime"""
@@ -59,8 +434,21 @@ class BaseModel:
         models.storage.save()
 
     def to_dict(self):
-        """returns a dictionary containing all keys/values of the instance"""
-        new_dict = self.__dict__.copy()
+        """returns a dictionary containing all keys/values of the instance,
+        a copy of the one cached since its last change"""
+        forms = serialized.get(self)
+        if forms is not None and forms[0] is not None:
+            return dict(forms[0])
+        new_dict = self.__to_dict()
+        if cacheable(new_dict):
+            forms = self.__forms()
+            if forms is not None:
+                forms[0] = dict(new_dict)
+        return new_dict
+
+    def __to_dict(self):
+        """returns a new to_dict() dictionary of the instance"""
+        new_dict = attributes(self)
         if "created_at" in new_dict:
             new_dict["created_at"] = new_dict["created_at"].strftime(time)
         if "updated_at" in new_dict:
@@ -2,6 +2,7 @@
 """class City"""
 import models
 from models.base_model import BaseModel, Base
+from models.engine import ids
 from os import getenv
 import sqlalchemy
 from sqlalchemy import Column, String, ForeignKey
@@ -12,7 +13,8 @@ class City(BaseModel, Base):
     """Representation of city """
     if models.storage_t == "db":
         __tablename__ = 'cities'
-        state_id = Column(String(60), ForeignKey('states.id'), nullable=False)
+        state_id = Column(ids.key_type(), ForeignKey('states.id'),
+                          nullable=False)
         name = Column(String(128), nullable=False)
         places = relationship("Place", backref="cities")
     else:
@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+"""
+The serialization codecs used by FileStorage for its file
+"""
+
+from datetime import datetime, timedelta
+import io
+import json
+from models.base_model import time
+from models.engine import stream
+import struct
+
+
+class JSONCodec:
+    """reads and writes the file as one JSON object of records"""
+    name = "json"
+
+    def encode(self, record):
+        """returns the JSON text of a record"""
+        return json.dumps(record, default=self.__default)
+
+    def __default(self, value):
+        """encodes the datetimes of records read by another codec"""
+        if type(value) is datetime:
+            return value.strftime(time)
+        raise TypeError("{} is not JSON serializable".format(type(value)))
+
+    def read(self, f):
+        """yields the (key, record) pairs of the binary file f"""
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        try:
+            for key, record in stream.read_records(text):
+                yield key, record
+        finally:
+            text.detach()
+
+    def write(self, f, items):
+        """writes the (key, encoded record) pairs to the binary file f"""
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        stream.write_records(text, items)
+        text.flush()
+        text.detach()
+
+
+class BinaryCodec:
+    """reads and writes the file as length-prefixed binary records with
+    typed fields, timestamps in microseconds since the epoch and class
+    and attribute names replaced by small integers"""
+    name = "binary"
+    magic = b"HBNB\x01"
+
+    # attribute names encoded as their index in this tuple; append only
+    names = ("created_at", "updated_at", "name", "state_id", "city_id",
+             "user_id", "place_id", "description", "number_rooms",
+             "number_bathrooms", "max_guest", "price_by_night", "latitude",
+             "longitude", "amenity_ids", "text", "email", "password",
+             "first_name", "last_name")
+    name_ids = {name: i for i, name in enumerate(names)}
+
+    # entry and value tags
+    CLASS, RECORD = 1, 2
+    NONE, TRUE, FALSE, INT, FLOAT, STR, DATETIME, JSON = range(8)
+    # names not in the names table
+    INLINE = 255
+
+    epoch = datetime(1970, 1, 1)
+    microsecond = timedelta(microseconds=1)
+
+    def encode(self, record):
+        """returns the bytes of a record, without its class name"""
+        out = bytearray()
+        fields = [(key, value) for key, value in record.items()
+                  if key != "__class__" and key != "id"]
+        self.__string(out, record.get("id", ""))
+        out += struct.pack("<H", len(fields))
+        for key, value in fields:
+            name_id = self.name_ids.get(key)
+            if name_id is None:
+                out.append(self.INLINE)
+                self.__string(out, key)
+            else:
+                out.append(name_id)
+            if key in ("created_at", "updated_at") and type(value) is str:
+                value = datetime.fromisoformat(value)
+            self.__value(out, value)
+        return bytes(out)
+
+    def __string(self, out, value):
+        """appends a length-prefixed UTF-8 string to out"""
+        data = value.encode("utf-8")
+        out += struct.pack("<I", len(data))
+        out += data
+
+    def __value(self, out, value):
+        """appends a tagged value to out"""
+        kind = type(value)
+        if value is None:
+            out.append(self.NONE)
+        elif kind is bool:
+            out.append(self.TRUE if value else self.FALSE)
+        elif kind is int and -2 ** 63 <= value < 2 ** 63:
+            out.append(self.INT)
+            out += struct.pack("<q", value)
+        elif kind is float:
+            out.append(self.FLOAT)
+            out += struct.pack("<d", value)
+        elif kind is str:
+            out.append(self.STR)
+            self.__string(out, value)
+        elif kind is datetime:
+            out.append(self.DATETIME)
+            out += struct.pack("<q", (value - self.epoch) // self.microsecond)
+        else:
+            out.append(self.JSON)
+            self.__string(out, json.dumps(value))
+
+    def decode(self, data, pos=0):
+        """returns the record encoded in data from pos, without its class
+        name"""
+        unpack = struct.unpack_from
+        size, = unpack("<I", data, pos)
+        record = {"id": data[pos + 4:pos + 4 + size].decode("utf-8")}
+        pos += 4 + size
+        count, = unpack("<H", data, pos)
+        pos += 2
+        for i in range(count):
+            name_id = data[pos]
+            pos += 1
+            if name_id == self.INLINE:
+                size, = unpack("<I", data, pos)
+                name = data[pos + 4:pos + 4 + size].decode("utf-8")
+                pos += 4 + size
+            else:
+                name = self.names[name_id]
+            tag = data[pos]
+            pos += 1
+            if tag == self.STR or tag == self.JSON:
+                size, = unpack("<I", data, pos)
+                value = data[pos + 4:pos + 4 + size].decode("utf-8")
+                pos += 4 + size
+                if tag == self.JSON:
+                    value = json.loads(value)
+            elif tag == self.DATETIME:
+                value = self.epoch + unpack("<q", data, pos)[0] * \
+                    self.microsecond
+                pos += 8
+            elif tag == self.INT:
+                value, = unpack("<q", data, pos)
+                pos += 8
+            elif tag == self.FLOAT:
+                value, = unpack("<d", data, pos)
+                pos += 8
+            else:
+                value = (None, True, False)[tag]
+            record[name] = value
+        return record
+
+    def read(self, f):
+        """yields the (key, record) pairs of the binary file f"""
+        if f.read(len(self.magic)) != self.magic:
+            raise ValueError("not a binary storage file")
+        class_names = []
+        while True:
+            head = f.read(5)
+            if not head:
+                return
+            if len(head) < 5:
+                raise ValueError("truncated storage file")
+            tag, size = struct.unpack("<BI", head)
+            data = f.read(size)
+            if len(data) < size:
+                raise ValueError("truncated storage file")
+            if tag == self.CLASS:
+                class_names.append(data.decode("utf-8"))
+            elif tag == self.RECORD:
+                name = class_names[struct.unpack_from("<H", data)[0]]
+                record = self.decode(data, 2)
+                record["__class__"] = name
+                yield name + "." + record["id"], record
+            else:
+                raise ValueError("unknown entry {}".format(tag))
+
+    def write(self, f, items):
+        """writes the (key, encoded record) pairs to the binary file f"""
+        f.write(self.magic)
+        class_ids = {}
+        for key, data in items:
+            name = key.split(".")[0]
+            if name not in class_ids:
+                class_ids[name] = len(class_ids)
+                encoded = name.encode("utf-8")
+                f.write(struct.pack("<BI", self.CLASS, len(encoded)))
+                f.write(encoded)
+            f.write(struct.pack("<BIH", self.RECORD, len(data) + 2,
+                                class_ids[name]))
+            f.write(data)
+
+
+codecs = {"json": JSONCodec(), "binary": BinaryCodec()}
+
+
+def detect(f):
+    """returns the codec the binary file f was written with, leaving f at
+    its start"""
+    head = f.read(len(BinaryCodec.magic))
+    f.seek(0)
+    if head == BinaryCodec.magic:
+        return codecs["binary"]
+    return codecs["json"]
@@ -0,0 +1,249 @@
+#!/usr/bin/python3
+"""
+NumPy column tables FileStorage keeps of the attributes of a class, and
+the read-only snapshots of them used for vectorized filters and
+aggregates; NumPy is optional and only needed once columns are asked for
+"""
+
+from models.engine import filters
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# aggregates of Snapshot.stats and Snapshot.group
+aggregates = ("count", "sum", "mean", "min", "max")
+
+
+def require():
+    """raises ImportError if NumPy is not installed"""
+    if numpy is None:
+        raise ImportError("storage columns need numpy")
+
+
+class Table:
+    """writable columns of numeric attributes (float, NaN when missing) and
+    of string attributes (integer codes into labels, -1 when missing), one
+    row per object ordinal"""
+    def __init__(self, numbers, strings):
+        """makes an empty table of the numbers and strings attributes"""
+        require()
+        self.numbers = numbers
+        self.strings = strings
+        # array - <class name>.id of every row, None for unused rows
+        self.keys = numpy.full(0, None, dtype=object)
+        self.valid = numpy.zeros(0, dtype=bool)
+        # integers - one past the last row ever used, and the number of used
+        # rows
+        self.size = 0
+        self.used = 0
+        self.data = {name: numpy.zeros(0) for name in numbers}
+        self.data.update({name: numpy.zeros(0, dtype=numpy.int32)
+                          for name in strings})
+        # dictionary - string attribute -> list of its distinct values and
+        # value -> code
+        self.labels = {name: [] for name in strings}
+        self.codes = {name: {} for name in strings}
+        # integer - bumped by every change, for snapshots to tell they are
+        # out of date
+        self.version = 0
+
+    def __grow(self, size):
+        """makes room for size rows"""
+        if size <= len(self.valid):
+            return
+        size = max(size, 2 * len(self.valid), 64)
+        extra = size - len(self.valid)
+        self.keys = numpy.concatenate([self.keys, numpy.full(extra, None,
+                                                             dtype=object)])
+        self.valid = numpy.concatenate([self.valid,
+                                        numpy.zeros(extra, dtype=bool)])
+        for name, column in self.data.items():
+            fill = numpy.full(extra, -1 if name in self.codes else numpy.nan,
+                              dtype=column.dtype)
+            self.data[name] = numpy.concatenate([column, fill])
+
+    def code(self, name, value):
+        """returns the code of the value of the string attribute name,
+        giving it one if it has none"""
+        codes = self.codes[name]
+        if value not in codes:
+            codes[value] = len(self.labels[name])
+            self.labels[name].append(value)
+        return codes[value]
+
+    def set_row(self, row, key, obj):
+        """writes the attributes of obj, stored under key, to row"""
+        self.__grow(row + 1)
+        self.size = max(self.size, row + 1)
+        self.used += not self.valid[row]
+        self.keys[row] = key
+        self.valid[row] = True
+        for name in self.numbers:
+            value = getattr(obj, name, None)
+            if type(value) not in (int, float):
+                value = numpy.nan
+            self.data[name][row] = value
+        for name in self.strings:
+            value = getattr(obj, name, None)
+            self.data[name][row] = -1 if type(value) is not str else \
+                self.code(name, value)
+        self.version += 1
+
+    def clear_row(self, row):
+        """marks row unused"""
+        if row < len(self.keys) and self.valid[row]:
+            self.used -= 1
+            self.keys[row] = None
+            self.valid[row] = False
+            self.version += 1
+
+    def snapshot(self):
+        """returns a read-only Snapshot of the used rows"""
+        if self.used == self.size:
+            # no unused row in between, copying is faster than indexing
+            rows = slice(0, self.size)
+            return Snapshot(self.keys[rows].copy(),
+                            {name: column[rows].copy() for name, column in
+                             self.data.items()},
+                            {name: list(values) for name, values in
+                             self.labels.items()})
+        rows = numpy.flatnonzero(self.valid)
+        columns = {name: column[rows] for name, column in self.data.items()}
+        labels = {name: list(values) for name, values in self.labels.items()}
+        return Snapshot(self.keys[rows], columns, labels)
+
+
+class Snapshot:
+    """read-only columns of a set of objects: keys holds their
+    <class name>.id, columns the arrays of their attributes and labels the
+    values of the coded string attributes"""
+    def __init__(self, keys, columns, labels):
+        """wraps the arrays, making them read-only"""
+        self.keys = keys
+        self.columns = columns
+        self.labels = labels
+        for array in [keys] + list(columns.values()):
+            array.setflags(write=False)
+
+    @classmethod
+    def from_rows(cls, rows, numbers, strings):
+        """returns the Snapshot of the (key, {attribute: value}) rows"""
+        require()
+        table = Table(numbers, strings)
+        for row, (key, values) in enumerate(rows):
+            table.set_row(row, key, Values(values))
+        return table.snapshot()
+
+    def __len__(self):
+        """returns the number of rows"""
+        return len(self.keys)
+
+    def __getitem__(self, name):
+        """returns the column of the attribute name"""
+        return self.columns[name]
+
+    def values(self, name):
+        """returns the values of the string attribute name, None where
+        missing, as an object array"""
+        labels = numpy.array(self.labels[name] + [None], dtype=object)
+        return labels[self.columns[name]]
+
+    def mask(self, **where):
+        """returns the boolean array of the rows passing the filters of
+        filters.parse (all and any excepted)"""
+        mask = numpy.ones(len(self), dtype=bool)
+        for name, op, value in filters.parse(where):
+            column = self.columns[name]
+            if name in self.labels:
+                codes = {label: code for code, label in
+                         enumerate(self.labels[name])}
+                if op == "in":
+                    value = [codes[v] for v in value if v in codes]
+                elif op in ("eq", "ne"):
+                    value = codes.get(value, -2)
+                else:
+                    raise ValueError("{} only supports eq, ne and in"
+                                     .format(name))
+            if op == "in":
+                mask &= numpy.isin(column, list(value))
+            elif op in ("all", "any"):
+                raise ValueError("columns do not support {}".format(op))
+            else:
+                mask &= filters.operators[op](column, value)
+        return mask
+
+    def filter(self, **where):
+        """returns the Snapshot of the rows passing the filters"""
+        mask = self.mask(**where)
+        return Snapshot(self.keys[mask], {name: column[mask] for name, column
+                                          in self.columns.items()},
+                        self.labels)
+
+    def join(self, name, by, mapping):
+        """returns a Snapshot with a new string column name, holding the
+        value mapping gives to the by value of each row"""
+        codes = {}
+        labels = []
+        lookup = numpy.full(len(self.labels[by]) + 1, -1, dtype=numpy.int32)
+        for code, label in enumerate(self.labels[by]):
+            value = mapping.get(label)
+            if type(value) is str:
+                if value not in codes:
+                    codes[value] = len(labels)
+                    labels.append(value)
+                lookup[code] = codes[value]
+        columns = dict(self.columns)
+        columns[name] = lookup[self.columns[by]]
+        return Snapshot(self.keys, columns, dict(self.labels, **{name:
+                                                                 labels}))
+
+    def stats(self, name):
+        """returns the count, sum, mean, min and max of the column name,
+        leaving out missing values"""
+        column = self.columns[name]
+        column = column[~numpy.isnan(column)]
+        if not len(column):
+            return {"count": 0, "sum": 0.0, "mean": None, "min": None,
+                    "max": None}
+        return {"count": len(column), "sum": float(column.sum()),
+                "mean": float(column.mean()), "min": float(column.min()),
+                "max": float(column.max())}
+
+    def group(self, by, name=None, how="count"):
+        """returns the dictionary of each value of the string column by to
+        the aggregate how (one of aggregates) of the column name over its
+        rows, leaving out missing values"""
+        if how not in aggregates:
+            raise ValueError("unknown aggregate {}".format(how))
+        if name is None and how != "count":
+            raise ValueError("{} needs a column".format(how))
+        codes = self.columns[by]
+        keep = codes >= 0
+        if name is not None:
+            values = self.columns[name]
+            keep &= ~numpy.isnan(values)
+            values = values[keep]
+        codes = codes[keep]
+        size = len(self.labels[by])
+        counts = numpy.bincount(codes, minlength=size)
+        if how == "count":
+            result = counts
+        elif how in ("sum", "mean"):
+            result = numpy.bincount(codes, weights=values, minlength=size)
+            if how == "mean":
+                result = result / numpy.maximum(counts, 1)
+        else:
+            ufunc = numpy.minimum if how == "min" else numpy.maximum
+            start = numpy.inf if how == "min" else -numpy.inf
+            result = numpy.full(size, start)
+            ufunc.at(result, codes, values)
+        return {self.labels[by][code]: result[code].item()
+                for code in numpy.flatnonzero(counts)}
+
+
+class Values:
+    """an object whose attributes are the items of a dictionary"""
+    def __init__(self, values):
+        """wraps values"""
+        self.__dict__.update(values)
@@ -3,27 +3,46 @@
 The class DBStorage
 """
 
+from contextlib import contextmanager
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
 from models.city import City
+from models.engine import columns, filters, geo, ids
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func
+from sqlalchemy.dialects.mysql import match
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# columns under a FULLTEXT index, for full-text search
+text_keys = {Place: ("name", "description"), Review: ("text",)}
+# list attributes of file storage -> (association table, column of the
+# row id, column of the listed value)
+set_keys = {Place: {"amenity_ids": ("place_amenity", "place_id",
+                                    "amenity_id")}}
+# columns counted by facets(), by value or, given bucket lower bounds, by
+# bucket
+facet_keys = {Place: {"city_id": None,
+                      "price_by_night": (0, 50, 100, 200, 500)}}
+# numeric and string columns read into columns.Snapshot arrays
+column_keys = {Place: (("price_by_night", "max_guest", "number_rooms",
+                        "number_bathrooms", "latitude", "longitude"),
+                       ("city_id", "user_id"))}
+
 
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
     __session = None
+    __batch = False
 
     def __init__(self):
         """Instantiate a DBStorage object"""
@@ -51,12 +70,238 @@ class DBStorage:
                     new_dict[key] = obj
         return (new_dict)
 
+    def get(self, cls, id):
+        """returns the cls object with the given id, or None"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return None
+        if ids.binary and not ids.is_uuid(id):
+            # binary keys only hold UUIDs
+            return None
+        return self.__session.get(cls, id)
+
+    def count(self, cls=None):
+        """returns the number of rows, of every table or of cls; 0 for an
+        unknown class"""
+        if type(cls) is str:
+            if cls not in classes:
+                return 0
+            cls = classes[cls]
+        if cls is not None and cls not in classes.values():
+            return 0
+        total = 0
+        for clss in classes.values():
+            if cls is None or cls is clss:
+                total += self.__session.query(func.count(clss.id)).scalar()
+        return total
+
+    def query(self, cls, order_by=None, limit=None, offset=0, **where):
+        """returns the list of cls rows passing the filters (name=value, or
+        name__<op>=value with op one of eq, ne, lt, lte, gt, gte, in, all,
+        any; places may also be filtered on the state_id of their city),
+        sorted by order_by ("-name" for descending) and sliced by offset and
+        limit, all in SQL"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return []
+        query = self.__session.query(cls).filter(
+            *self.__conditions(cls, filters.parse(where)))
+        if order_by:
+            column = getattr(cls, order_by.lstrip("-"))
+            if order_by.startswith("-"):
+                column = column.desc()
+            query = query.order_by(column)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def near(self, cls, latitude, longitude, km, limit=None):
+        """returns the list of cls rows within km kilometers of a point,
+        nearest first, selecting the rows of the surrounding box in SQL"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls is not Place:
+            return []
+        found = []
+        for place in self.__in_box(*geo.box(latitude, longitude, km)):
+            distance = geo.haversine(latitude, longitude, place.latitude,
+                                     place.longitude)
+            if distance <= km:
+                found.append((distance, place.id, place))
+        found.sort(key=lambda item: item[:2])
+        return [place for distance, id, place in found[:limit]]
+
+    def within(self, cls, south, west, north, east, limit=None):
+        """returns the list of cls rows in a latitude/longitude box (one
+        crossing the antimeridian has west > east), nearest to its center
+        first"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls is not Place:
+            return []
+        lat = (south + north) / 2
+        lon = (west + east) / 2
+        if west > east:
+            lon = lon + 180 if lon <= 0 else lon - 180
+        found = [(geo.haversine(lat, lon, place.latitude, place.longitude),
+                  place.id, place)
+                 for place in self.__in_box(south, west, north, east)]
+        found.sort(key=lambda item: item[:2])
+        return [place for distance, id, place in found[:limit]]
+
+    def search(self, cls, text, limit=None):
+        """returns the list of cls rows whose FULLTEXT columns match words
+        of text, best MySQL relevance first"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in text_keys:
+            return []
+        score = match(*(getattr(cls, name) for name in text_keys[cls]),
+                      against=text)
+        query = self.__session.query(cls).filter(score > 0)
+        query = query.order_by(score.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def columns(self, cls):
+        """returns a read-only columns.Snapshot of the column_keys columns
+        of the cls rows, with the state_id of their city joined in for
+        places; needs NumPy"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in column_keys:
+            raise ValueError("{} has no columns".format(cls))
+        numbers, strings = column_keys[cls]
+        query = self.__session.query(cls.id, *(getattr(cls, name) for name
+                                               in numbers + strings))
+        if cls is Place:
+            query = query.add_columns(City.state_id).outerjoin(
+                City, Place.city_id == City.id)
+            strings = strings + ("state_id",)
+        rows = ((cls.__name__ + "." + row[0],
+                 dict(zip(numbers + strings, row[1:]))) for row in query)
+        return columns.Snapshot.from_rows(rows, numbers, strings)
+
+    def facets(self, cls, **where):
+        """returns {facet: {value: number of cls rows}} for the facet_keys
+        and set_keys columns (and state_id, through the city, for places),
+        counting for each facet the rows passing the query filters of where
+        that are not on that facet, in SQL"""
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in facet_keys:
+            raise ValueError("{} has no facets".format(cls))
+        triples = filters.parse(where)
+        found = {}
+        names = list(facet_keys[cls]) + list(set_keys.get(cls, {}))
+        if cls is Place:
+            names.append("state_id")
+        for facet in names:
+            conditions = self.__conditions(cls, [
+                triple for triple in triples if triple[0] != facet])
+            if facet == "state_id":
+                value = City.state_id
+                query = self.__session.query(value, func.count(cls.id)) \
+                    .select_from(cls).join(City, Place.city_id == City.id)
+            elif facet in set_keys.get(cls, {}):
+                table, fk, column = set_keys[cls][facet]
+                table = Base.metadata.tables[table]
+                value = table.c[column]
+                query = self.__session.query(value, func.count(cls.id)) \
+                    .select_from(table).join(cls, cls.id == table.c[fk])
+            else:
+                value = getattr(cls, facet)
+                buckets = facet_keys[cls][facet]
+                if buckets is not None:
+                    value = sqlalchemy.case(
+                        *((value >= bucket, bucket) for bucket in
+                          reversed(buckets)), else_=None)
+                query = self.__session.query(value, func.count(cls.id))
+            query = query.filter(*conditions).group_by(value)
+            found[facet] = {value: count for value, count in query
+                            if value is not None}
+        return found
+
+    def __conditions(self, cls, triples):
+        """returns the SQL conditions of the (attribute, operator, value)
+        filters, where places may also be filtered on the state_id of their
+        city"""
+        conditions = []
+        for name, op, value in triples:
+            if name in set_keys.get(cls, {}):
+                conditions.append(self.__in_set(cls, name, op, value))
+                continue
+            if name == "state_id" and cls is Place:
+                cities = sqlalchemy.select(City.id).where(
+                    *self.__conditions(City, [(name, op, value)]))
+                conditions.append(Place.city_id.in_(cities))
+                continue
+            column = getattr(cls, name)
+            if op == "in":
+                conditions.append(column.in_(value))
+            else:
+                conditions.append(filters.operators[op](column, value))
+        return conditions
+
+    def __in_set(self, cls, name, op, value):
+        """returns the SQL condition of an all or any filter on the list
+        attribute name, kept in an association table"""
+        table, fk, column = set_keys[cls][name]
+        table = Base.metadata.tables[table]
+        values = set(value)
+        if op == "all" and not values:
+            return sqlalchemy.true()
+        rows = sqlalchemy.select(table.c[fk]).where(
+            table.c[column].in_(values))
+        if op == "all":
+            rows = rows.group_by(table.c[fk]).having(
+                func.count(table.c[column]) == len(values))
+        elif op != "any":
+            raise ValueError("{} does not support {}".format(name, op))
+        return cls.id.in_(rows)
+
+    def __in_box(self, south, west, north, east):
+        """returns the places in a latitude/longitude box"""
+        query = self.__session.query(Place).filter(
+            Place.latitude.between(south, north))
+        if west <= east:
+            query = query.filter(Place.longitude.between(west, east))
+        else:
+            query = query.filter(sqlalchemy.or_(Place.longitude >= west,
+                                                Place.longitude <= east))
+        return query.all()
+
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
 
     def save(self):
-        """commit all changes of the current database session"""
+        """commit all changes of the current database session, or leave
+        them to the end of the open batch"""
+        if not self.__batch:
+            self.__session.commit()
+
+    @contextmanager
+    def batch(self):
+        """commits once at the end of the with block, or rolls the session
+        back if the block raises. A batch opened inside another one joins
+        it"""
+        if self.__batch:
+            yield self
+            return
+        self.__batch = True
+        try:
+            yield self
+        except BaseException:
+            self.__session.rollback()
+            raise
+        finally:
+            self.__batch = False
         self.__session.commit()
 
     def delete(self, obj=None):
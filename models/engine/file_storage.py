@@ -3,18 +3,152 @@
 The FileStorage class
 """
 
+import bisect
+from contextlib import contextmanager
+import copy
 import json
+from models import base_model
 from models.amenity import Amenity
-from models.base_model import BaseModel
+from models.base_model import BaseModel, Tracked, dirty, moved
 from models.city import City
+from models.engine import columns, filters, geo
+from models.engine.text import TextIndex
+from models.engine.codecs import codecs, detect
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+import itertools
+import os
+from os import getenv
+import pickle
+import shutil
+import sys
+import threading
+import weakref
+import zlib
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# foreign keys indexed for reverse (parent id -> children) lookups
+foreign_keys = {"City": ("state_id",), "Place": ("city_id", "user_id"),
+                "Review": ("place_id", "user_id")}
+
+# numeric attributes indexed for range queries
+range_keys = {"Place": ("price_by_night", "max_guest", "number_rooms",
+                        "number_bathrooms")}
+# latitude and longitude attributes indexed for radius and box searches
+geo_keys = {"Place": ("latitude", "longitude")}
+# text attributes indexed for full-text search
+text_keys = {"Place": ("name", "description"), "Review": ("text",)}
+# list attributes indexed as value -> bitmap of object ordinals, for all and
+# any filters
+set_keys = {"Place": ("amenity_ids",)}
+# attributes counted by facets(), by value or, given bucket lower bounds,
+# by bucket; they share the bitmaps of set_keys
+facet_keys = {"Place": {"city_id": None,
+                        "price_by_night": (0, 50, 100, 200, 500)}}
+# numeric and string attributes kept as NumPy columns, one row per ordinal
+column_keys = {"Place": (("price_by_night", "max_guest", "number_rooms",
+                          "number_bathrooms", "latitude", "longitude"),
+                         ("city_id", "user_id"))}
+for keys in [foreign_keys, range_keys, geo_keys, text_keys, set_keys,
+             facet_keys]:
+    for names in keys.values():
+        base_model.watched.update(names)
+for numbers, strings in column_keys.values():
+    base_model.watched.update(numbers + strings)
+for keys in [foreign_keys, set_keys]:
+    for names in keys.values():
+        base_model.interned.update(names)
+for names in set_keys.values():
+    base_model.tracked.update(names)
+
+
+# number of bits set in an int bitmap
+popcount = getattr(int, "bit_count", lambda bits: bin(bits).count("1"))
+
+
+class Greatest:
+    """compares greater than any key, to bisect past a run of equal values
+    in lists of (value, key)"""
+    def __lt__(self, other):
+        """nothing is smaller"""
+        return False
+
+    def __gt__(self, other):
+        """everything else is smaller"""
+        return True
+
+
+greatest = Greatest()
+
+
+def read_records(path):
+    """yields the (key, record) pairs of the file at path, up to the first
+    unreadable record or unknown class, with the class names interned"""
+    try:
+        with open(path, 'rb') as f:
+            for key, record in detect(f).read(f):
+                name = record.get("__class__")
+                if name not in classes:
+                    return
+                record["__class__"] = sys.intern(name)
+                yield key, record
+    except:
+        return
+
+
+def build(pairs, size=10000):
+    """yields the (key, object) pairs of the (key, record) pairs, building
+    the records of each class at once with from_dicts, size records at a
+    time so that only that many are held besides the objects; like reload
+    always has, it stops at the first record that cannot be built"""
+    pairs = iter(pairs)
+    while True:
+        chunk = list(itertools.islice(pairs, size))
+        if not chunk:
+            return
+        rows = {}
+        for i, (key, record) in enumerate(chunk):
+            rows.setdefault(record["__class__"], []).append(i)
+        built = [None] * len(chunk)
+        try:
+            for name, group in rows.items():
+                objs = classes[name].from_dicts([chunk[i][1]
+                                                 for i in group])
+                for i, obj in zip(group, objs):
+                    built[i] = (chunk[i][0], obj)
+        except Exception:
+            for key, record in chunk:
+                try:
+                    obj = classes[record["__class__"]].from_dict(record)
+                except Exception:
+                    return
+                yield key, obj
+            return
+        yield from built
+
+
+def read_shard(path):
+    """returns the records of the file at path as [(field names, [(key,
+    values), ...])], grouping the records with the same fields, which
+    pickles smaller and loads back several times faster than the records
+    or the objects built from them; run in worker processes"""
+    groups = {}
+    for key, record in read_records(path):
+        groups.setdefault(tuple(record), []).append((key,
+                                                     tuple(record.values())))
+    return list(groups.items())
+
+
+def unpack(groups):
+    """yields the (key, record) pairs of the groups read_shard returns"""
+    for names, rows in groups:
+        for key, values in rows:
+            yield key, dict(zip(names, values))
+
 
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
@@ -23,48 +157,1269 @@ class FileStorage:
     __file_path = "file.json"
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - the same objects bucketed by <class name>, then by key
+    __by_class = {}
+    # dictionary - <class name>.<foreign key> -> parent id -> {key: obj}
+    __children = {}
+    # dictionary - key -> {foreign key: parent id} it is indexed under
+    __parents = {}
+    # dictionary - key -> name it is sorted under in the name indexes
+    __names = {}
+    # dictionary - <class name> -> sorted [(name, key)], built on first use
+    __by_name = {}
+    # dictionary - <class name>.<foreign key> -> parent id -> sorted
+    # [(name, key)], built on first use
+    __children_by_name = {}
+    # dictionary - <class name>.<attribute> -> sorted [(value, key)] of the
+    # numeric range_keys values, built on first use
+    __ranges = {}
+    # dictionary - key -> {attribute: value} it is indexed under
+    __range_values = {}
+    # dictionary - <class name> -> geo.Grid of the geo_keys coordinates,
+    # built on first use
+    __grids = {}
+    # dictionary - <class name> -> TextIndex of the text_keys attributes,
+    # built on first use or read back from <file path>.text, and whether
+    # it changed since it was last written there
+    __texts = {}
+    __texts_changed = False
+    # dictionary - <class name> -> {<class name>.id: ordinal}, the ordinal
+    # -> <class name>.id list (None for freed ordinals) and the freed
+    # ordinals, of the set_keys, facet_keys and column_keys classes
+    __ordinals = {}
+    __ordinal_keys = {}
+    __free_ordinals = {}
+    # dictionary - <class name>.<attribute> -> {value: int bitmap of the
+    # ordinals of the objects filed under it}, built on first use, and
+    # {value: number of those objects}, always kept
+    __bitmaps = {}
+    __counts = {}
+    # dictionary - <class name>.id -> {attribute: frozenset of the values
+    # it is filed under}
+    __set_values = {}
+    # dictionary - <class name> -> columns.Table of the column_keys
+    # attributes, built on first use, and the last snapshot taken of it
+    __tables = {}
+    __snapshots = {}
+    # the __objects dictionary the buckets were built from, and its size
+    __indexed = None
+    __indexed_len = 0
+    # boolean - __objects was changed without going through new()/delete()
+    __out_of_band = False
+    # string - name of the codec the file is written with
+    __codec = getenv("HBNB_FILE_CODEC", "json")
+    # dictionary - key -> (obj, codec, obj encoded when it was last clean)
+    __serialized = {}
+    # dictionary - key -> (obj, copies of its list and dict values as last
+    # loaded or serialized), for the objects holding such values, which
+    # change in place without marking obj dirty
+    __mutable = {}
+    # boolean - append changes to a journal instead of rewriting the file
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    # dictionary - key -> obj (or None once deleted) not yet journaled
+    __pending = {}
+    # integer - records in the journal, and how many trigger compaction
+    __journal_len = 0
+    __compact_min = 1000
+    # (mtime, size, inode) of the JSON file and of the journal when they
+    # were last read or written, the __objects they were read into, and
+    # how many bytes of the journal have been replayed
+    __file_stamp = None
+    __journal_stamp = None
+    __loaded_into = None
+    __journal_offset = 0
+    # boolean - keep reloaded records as dicts until their class is used
+    __lazy = getenv("HBNB_FILE_LAZY") == "1"
+    # dictionary - <class name> -> {key: record} reloaded but not built yet
+    __raw = {}
+    # integer - hash buckets per class when the file is split into one
+    # shard file per class and bucket under <file path>.d, 0 for one file;
+    # the number the shards were written with is kept in <file path>.d/.shards
+    __shards = int(getenv("HBNB_FILE_SHARDS", "0"))
+    # dictionary - shard name -> (mtime, size, inode) when last read/written
+    __shard_stamps = {}
+    # set - shards with objects added or deleted since they were written
+    __dirty_shards = set()
+    # integer - processes decoding the shards in parallel on the initial
+    # load, outside lazy mode and only while the process has one thread
+    # (forking a threaded process may deadlock the children), and the size
+    # in bytes under which they are read serially instead
+    __workers = int(getenv("HBNB_FILE_WORKERS", "0"))
+    __parallel_min = 4 * 1024 * 1024
+    # dictionary - key -> object stored before the open batch first touched
+    # it (None if there was none), None when no batch is open
+    __undo = None
+    # boolean - whether save was called during the open batch
+    __batch_saved = False
 
     def all(self, cls=None):
         """returns the dictionary __objects"""
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            if type(cls) is not str:
+                cls = cls.__name__
+            self.__materialize(cls)
+            return dict(self.__buckets().get(cls, {}))
+        self.__materialize()
         return self.__objects
 
+    def get(self, cls, id):
+        """returns the cls object with the given id, or None"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        key = cls + "." + str(id)
+        if FileStorage.__raw:
+            self.__build(key)
+        return self.__objects.get(key)
+
+    def count(self, cls=None):
+        """returns the number of stored objects, or of cls objects"""
+        raw = FileStorage.__raw
+        if cls is None:
+            return len(self.__objects) + sum(len(records) for records
+                                             in raw.values())
+        if type(cls) is not str:
+            cls = cls.__name__
+        return len(self.__buckets().get(cls, {})) + len(raw.get(cls, {}))
+
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
+            self.__buckets()
             key = obj.__class__.__name__ + "." + obj.id
+            if FileStorage.__undo is not None:
+                self.__remember(key)
+            if FileStorage.__raw:
+                FileStorage.__raw.get(key.split(".")[0], {}).pop(key, None)
             self.__objects[key] = obj
+            self.__index(key, obj)
+            FileStorage.__pending[key] = obj
+            if FileStorage.__shards:
+                FileStorage.__dirty_shards.add(self.__shard(key))
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        """serializes __objects to the JSON file (path: __file_path), or
+        appends the added, deleted and changed objects to the journal in
+        journal mode; in a batch, waits for the batch to end"""
+        if FileStorage.__undo is not None:
+            FileStorage.__batch_saved = True
+            return
+        self.__buckets()
+        if not FileStorage.__journal or FileStorage.__out_of_band or \
+           FileStorage.__loaded_into is not FileStorage.__objects or \
+           FileStorage.__journal_len >= max(FileStorage.__compact_min,
+                                            len(FileStorage.__objects) // 2):
+            self.__compact()
+            return
+        self.__mutated()
+        for obj in list(dirty):
+            key = obj.__class__.__name__ + "." + getattr(obj, "id", "")
+            if self.__objects.get(key) is obj:
+                FileStorage.__pending[key] = obj
+        if not FileStorage.__pending:
+            return
+        with open(self.__journal_path(), 'a') as f:
+            for key, obj in FileStorage.__pending.items():
+                value = "null"
+                if obj is not None:
+                    value = self.__serialize(key, obj, codecs["json"])
+                f.write('{"key": ' + json.dumps(key) +
+                        ', "value": ' + value + '}\n')
+        FileStorage.__journal_len += len(FileStorage.__pending)
+        FileStorage.__pending = {}
+        FileStorage.__journal_stamp = self.__stamp(self.__journal_path())
+        FileStorage.__journal_offset = FileStorage.__journal_stamp[1]
 
     def reload(self):
-        """deserializes the JSON file to __objects"""
-        try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except:
-            pass
+        """deserializes the JSON file (or its shards) to __objects, then
+        replays the journal on top of it, skipping whatever did not change
+        on disk since it was last read or written"""
+        self.__buckets()
+        if FileStorage.__loaded_into is not FileStorage.__objects:
+            FileStorage.__file_stamp = None
+            FileStorage.__shard_stamps = {}
+            FileStorage.__journal_stamp = None
+            FileStorage.__raw = {}
+        if self.__sharded():
+            changed = self.__reload_shards()
+        else:
+            changed = self.__reload_file()
+        FileStorage.__loaded_into = FileStorage.__objects
+        if changed:
+            FileStorage.__journal_stamp = None
+            FileStorage.__journal_offset = 0
+            FileStorage.__journal_len = 0
+            if not FileStorage.__texts:
+                self.__read_texts()
+        self.__replay()
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
+            self.__buckets()
             key = obj.__class__.__name__ + '.' + obj.id
+            if FileStorage.__raw:
+                self.__build(key)
             if key in self.__objects:
+                if FileStorage.__undo is not None:
+                    self.__remember(key)
                 del self.__objects[key]
+                self.__unindex(key)
+                FileStorage.__serialized.pop(key, None)
+                FileStorage.__mutable.pop(key, None)
+                FileStorage.__pending[key] = None
+                if FileStorage.__shards:
+                    FileStorage.__dirty_shards.add(self.__shard(key))
 
     def close(self):
         """call reload() method for deserializing the JSON file to objects"""
         self.reload()
+
+    def query(self, cls, order_by=None, limit=None, offset=0, **where):
+        """returns the list of cls objects passing the filters (name=value,
+        or name__<op>=value with op one of eq, ne, lt, lte, gt, gte, in,
+        all, any; places may also be filtered on the state_id of their
+        city), sorted by order_by ("-name" for descending) and sliced by
+        offset and limit, starting from the id, foreign key, bitmap, range
+        or name indexes when it can"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        triples = self.__through_city(cls, filters.parse(where))
+        objs = None
+        # whether objs is None or already sorted by name
+        by_name = True
+        for name, op, value in triples:
+            if op != "eq":
+                continue
+            if name == "id":
+                obj = self.get(cls, value)
+                objs = [] if obj is None else [obj]
+                break
+            if name in foreign_keys.get(cls, ()):
+                objs = self.children(cls, name, value)
+                break
+        if objs is None:
+            objs = self.__in_sets(cls, triples)
+            found = self.__in_range(cls, triples)
+            if found is not None and (objs is None or
+                                      len(found[1]) < len(objs)):
+                attr, objs = found
+                if order_by in (attr, "-" + attr):
+                    if order_by.startswith("-"):
+                        objs.reverse()
+                    order_by = None
+            by_name = objs is None
+        if order_by in ("name", "-name") and by_name:
+            if objs is None:
+                objs = self.__ordered(cls)
+            objs = [obj for obj in objs if filters.matches(obj, triples)]
+            if order_by == "-name":
+                objs.reverse()
+            return filters.page(objs, None, offset, limit)
+        if objs is None:
+            objs = self.all(cls).values()
+        objs = [obj for obj in objs if filters.matches(obj, triples)]
+        return filters.page(objs, order_by, offset, limit)
+
+    def near(self, cls, latitude, longitude, km, limit=None):
+        """returns the list of cls objects within km kilometers of a point,
+        nearest first"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in geo_keys:
+            return []
+        found = self.__grid(cls).near(latitude, longitude, km)
+        return [self.__objects[key] for distance, key in found[:limit]]
+
+    def within(self, cls, south, west, north, east, limit=None):
+        """returns the list of cls objects in a latitude/longitude box (one
+        crossing the antimeridian has west > east), nearest to its center
+        first"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in geo_keys:
+            return []
+        found = self.__grid(cls).within(south, west, north, east)
+        return [self.__objects[key] for distance, key in found[:limit]]
+
+    def search(self, cls, text, limit=None):
+        """returns the list of cls objects whose text_keys attributes
+        contain words of text, best BM25 score first"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in text_keys:
+            return []
+        found = self.__text_index(cls).search(text, limit)
+        objs = [self.get(cls, key.partition(".")[2]) for score, key in found]
+        return [obj for obj in objs if obj is not None]
+
+    def facets(self, cls, **where):
+        """returns {facet: {value: number of cls objects}} for the
+        facet_keys and set_keys attributes (and state_id, through the city,
+        for places), counting for each facet the objects passing the query
+        filters of where that are not on that facet"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in facet_keys:
+            raise ValueError("{} has no facets".format(cls))
+        filters.parse(where)
+        self.__materialize(cls)
+        self.__buckets()
+        self.__refresh()
+        names = list(facet_keys[cls]) + list(set_keys.get(cls, ()))
+        states = {}
+        if cls == "Place":
+            self.__materialize("City")
+            states = {city.id: getattr(city, "state_id", None) for city in
+                      FileStorage.__by_class.get("City", {}).values()}
+            names.append("state_id")
+        found = {}
+        # filter names -> bitmap of the objects passing them
+        selections = {}
+        for facet in names:
+            others = tuple(key for key in where
+                           if key.partition("__")[0] != facet)
+            if others not in selections:
+                selections[others] = self.__select(
+                    cls, states, **{key: where[key] for key in others})
+            selected = selections[others]
+            attr = "city_id" if facet == "state_id" else facet
+            if selected is None:
+                counts = dict(FileStorage.__counts.get(cls + "." + attr, {}))
+            else:
+                counts = {}
+                for value, bits in self.__bitmap(cls, attr).items():
+                    count = popcount(bits & selected)
+                    if count:
+                        counts[value] = count
+            if facet == "state_id":
+                by_state = {}
+                for city_id, count in counts.items():
+                    state_id = states.get(city_id)
+                    if state_id is not None:
+                        by_state[state_id] = by_state.get(state_id, 0) + count
+                counts = by_state
+            found[facet] = counts
+        return found
+
+    def columns(self, cls):
+        """returns a read-only columns.Snapshot of the column_keys
+        attributes of the cls objects, with the state_id of their city
+        joined in for places; needs NumPy"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in column_keys:
+            raise ValueError("{} has no columns".format(cls))
+        self.__materialize(cls)
+        self.__buckets()
+        self.__refresh()
+        table = FileStorage.__tables.get(cls)
+        if table is None:
+            table = columns.Table(*column_keys[cls])
+            for key, obj in FileStorage.__by_class.get(cls, {}).items():
+                table.set_row(self.__ordinal(cls, key), key, obj)
+            FileStorage.__tables[cls] = table
+        if cls == "Place":
+            self.__materialize("City")
+            states = {city.id: getattr(city, "state_id", None) for city in
+                      FileStorage.__by_class.get("City", {}).values()}
+            stamp = (table.version, states)
+        else:
+            stamp = (table.version, None)
+        snapshot = FileStorage.__snapshots.get(cls)
+        if snapshot is None or snapshot[0] != stamp:
+            found = table.snapshot()
+            if cls == "Place":
+                found = found.join("state_id", "city_id", states)
+            FileStorage.__snapshots[cls] = (stamp, found)
+        return FileStorage.__snapshots[cls][1]
+
+    @contextmanager
+    def batch(self):
+        """defers saving until the end of the with block, then saves once;
+        if the block raises, undoes its new, delete and attribute changes
+        instead. A batch opened inside another one joins it"""
+        if FileStorage.__undo is not None:
+            yield self
+            return
+        self.__buckets()
+        pending = dict(FileStorage.__pending)
+        shards = set(FileStorage.__dirty_shards)
+        FileStorage.__undo = {}
+        FileStorage.__batch_saved = False
+        base_model.snapshots = weakref.WeakKeyDictionary()
+        try:
+            yield self
+        except BaseException:
+            self.__rollback(pending, shards)
+            raise
+        finally:
+            undo = FileStorage.__undo
+            changed = base_model.snapshots
+            FileStorage.__undo = None
+            base_model.snapshots = None
+        if FileStorage.__batch_saved or undo or changed:
+            self.save()
+
+    def children(self, cls, fk, parent_id):
+        """returns the list of cls objects whose fk attribute is parent_id,
+        sorted by name"""
+        if type(cls) is not str:
+            cls = cls.__name__
+        if fk not in foreign_keys.get(cls, ()):
+            return [obj for obj in self.__ordered(cls)
+                    if getattr(obj, fk, None) == parent_id]
+        self.__materialize(cls)
+        self.__buckets()
+        self.__refresh()
+        group = FileStorage.__children.get(cls + "." + fk, {})
+        ordered = FileStorage.__children_by_name.setdefault(cls + "." + fk,
+                                                            {})
+        if parent_id not in group:
+            ordered.pop(parent_id, None)
+            return []
+        if parent_id not in ordered:
+            ordered[parent_id] = sorted((FileStorage.__names[key], key)
+                                        for key in group[parent_id])
+        return [obj for obj in self.__in_order(ordered[parent_id])
+                if getattr(obj, fk, None) == parent_id]
+
+    def __remember(self, key):
+        """records what key held before the open batch first touched it"""
+        if FileStorage.__raw:
+            self.__build(key)
+        if key not in FileStorage.__undo:
+            FileStorage.__undo[key] = self.__objects.get(key)
+
+    def __rollback(self, pending, shards):
+        """undoes the changes made in the open batch"""
+        for obj, attrs in base_model.snapshots.items():
+            if "id" in attrs:
+                base_model.restore(obj, attrs)
+        self.__buckets()
+        for key, obj in FileStorage.__undo.items():
+            FileStorage.__serialized.pop(key, None)
+            if obj is None:
+                if self.__objects.pop(key, None) is not None:
+                    self.__unindex(key)
+            else:
+                self.__objects[key] = obj
+                self.__index(key, obj)
+        for obj in base_model.snapshots:
+            key = obj.__class__.__name__ + "." + getattr(obj, "id", "")
+            if self.__objects.get(key) is obj:
+                self.__index(key, obj)
+        FileStorage.__pending = pending
+        FileStorage.__dirty_shards = shards
+
+    def __journal_path(self):
+        """returns the path of the journal kept next to the JSON file"""
+        return self.__file_path + ".journal"
+
+    def __shard_dir(self):
+        """returns the directory of the shard files"""
+        return self.__file_path + ".d"
+
+    def __shard(self, key):
+        """returns the name of the shard file key is stored in"""
+        cls, _, obj_id = key.partition(".")
+        bucket = zlib.crc32(obj_id.encode("utf-8")) % FileStorage.__shards
+        return "{}.{}".format(cls, bucket)
+
+    def __sharded(self):
+        """tells whether to read the shards rather than the single file:
+        whenever they exist, the single file being removed once migrated
+        to them (and they once merged back into it)"""
+        if os.path.isdir(self.__shard_dir()):
+            return True
+        return bool(FileStorage.__shards) and \
+            not os.path.exists(self.__file_path)
+
+    def __shard_count(self):
+        """returns the number of buckets the shard files were split into,
+        or None if unknown"""
+        try:
+            with open(os.path.join(self.__shard_dir(), ".shards")) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def __read(self, path):
+        """loads every record of the file at path, building the objects of
+        each class at once"""
+        self.__put(read_records(path))
+
+    def __put(self, pairs):
+        """loads the (key, record) pairs read from disk, building the
+        objects of each class at once"""
+        if FileStorage.__lazy:
+            for key, record in pairs:
+                self.__load(key, record)
+            return
+        for key, obj in build(pairs):
+            FileStorage.__pending.pop(key, None)
+            self.__objects[key] = obj
+            self.__index(key, obj)
+
+    def __reload_file(self):
+        """reads the single file if it changed, tells whether it did"""
+        stamp = self.__stamp(self.__file_path)
+        if stamp == FileStorage.__file_stamp:
+            return False
+        FileStorage.__raw = {}
+        self.__read(self.__file_path)
+        FileStorage.__file_stamp = stamp
+        return True
+
+    def __reload_shards(self):
+        """reads the shard files that changed, tells whether any did"""
+        paths = []
+        stamps = {}
+        try:
+            entries = list(os.scandir(self.__shard_dir()))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.name.endswith(".tmp") or entry.name.startswith("."):
+                continue
+            st = entry.stat()
+            stamps[entry.name] = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if FileStorage.__shard_stamps.get(entry.name) != \
+               stamps[entry.name]:
+                paths.append(entry.path)
+        size = sum(stamps[os.path.basename(path)][1] for path in paths)
+        if FileStorage.__workers > 1 and len(paths) > 1 and \
+           size >= FileStorage.__parallel_min and \
+           not FileStorage.__lazy and not FileStorage.__shard_stamps and \
+           threading.active_count() == 1 and hasattr(os, "fork"):
+            self.__read_parallel(paths)
+        else:
+            for path in paths:
+                self.__read(path)
+        FileStorage.__shard_stamps = stamps
+        return len(paths) > 0
+
+    def __read_parallel(self, paths):
+        """loads the shard files at paths, decoded in forked worker
+        processes that each send back their share of the records through
+        a pipe"""
+        workers = min(FileStorage.__workers, len(paths))
+        children = []
+        for i in range(workers):
+            r, w = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(r)
+                try:
+                    with os.fdopen(w, "wb") as out:
+                        pickle.dump([read_shard(path)
+                                     for path in paths[i::workers]], out,
+                                    pickle.HIGHEST_PROTOCOL)
+                finally:
+                    os._exit(0)
+            os.close(w)
+            children.append((pid, r, paths[i::workers]))
+        for pid, r, share in children:
+            with os.fdopen(r, "rb") as f:
+                try:
+                    results = pickle.load(f)
+                except Exception:
+                    results = None
+            os.waitpid(pid, 0)
+            if results is None:
+                for path in share:
+                    self.__read(path)
+                continue
+            for groups in results:
+                self.__put(unpack(groups))
+
+    def __write_shards(self, codec):
+        """rewrites the shard files holding added, deleted or changed
+        objects, or all of them when migrating from the single file or to
+        another number of buckets"""
+        directory = self.__shard_dir()
+        migrate = not os.path.isdir(directory)
+        reshard = migrate or self.__shard_count() != FileStorage.__shards
+        shards = FileStorage.__dirty_shards
+        for obj in list(dirty):
+            key = obj.__class__.__name__ + "." + getattr(obj, "id", "")
+            if self.__objects.get(key) is obj:
+                shards.add(self.__shard(key))
+        if reshard or FileStorage.__out_of_band:
+            shards.update(self.__shard(key) for key in self.__objects)
+            for records in FileStorage.__raw.values():
+                shards.update(self.__shard(key) for key in records)
+            if not migrate:
+                shards.update(name for name in os.listdir(directory)
+                              if not name.endswith(".tmp") and
+                              not name.startswith("."))
+        groups = {shard: [] for shard in shards}
+        for cls in set(shard.split(".")[0] for shard in shards):
+            for key, obj in FileStorage.__by_class.get(cls, {}).items():
+                group = groups.get(self.__shard(key))
+                if group is not None:
+                    group.append((key, self.__serialize(key, obj, codec)))
+            for key, record in FileStorage.__raw.get(cls, {}).items():
+                group = groups.get(self.__shard(key))
+                if group is not None:
+                    group.append((key, codec.encode(record)))
+        target = directory + ".tmp" if migrate else directory
+        os.makedirs(target, exist_ok=True)
+        for shard, items in groups.items():
+            path = os.path.join(target, shard)
+            if not items:
+                if os.path.exists(path):
+                    os.remove(path)
+                FileStorage.__shard_stamps.pop(shard, None)
+                continue
+            with open(path + ".tmp", 'wb') as f:
+                codec.write(f, items)
+            os.replace(path + ".tmp", path)
+        if reshard:
+            path = os.path.join(target, ".shards")
+            with open(path + ".tmp", 'w') as f:
+                f.write(str(FileStorage.__shards))
+            os.replace(path + ".tmp", path)
+        if migrate:
+            os.rename(target, directory)
+            if os.path.exists(self.__file_path):
+                os.remove(self.__file_path)
+            FileStorage.__file_stamp = None
+        for shard, items in groups.items():
+            if items:
+                FileStorage.__shard_stamps[shard] = self.__stamp(
+                    os.path.join(directory, shard))
+        FileStorage.__dirty_shards = set()
+
+    def __compact(self):
+        """rewrites the whole JSON file (or its changed shards) and empties
+        the journal"""
+        codec = codecs[FileStorage.__codec]
+        self.__mutated()
+        if FileStorage.__shards:
+            self.__write_shards(codec)
+        else:
+            path = self.__file_path
+            if FileStorage.__journal:
+                path = self.__file_path + ".tmp"
+            with open(path, 'wb') as f:
+                codec.write(f, self.__items(codec))
+            if FileStorage.__journal:
+                os.replace(path, self.__file_path)
+            FileStorage.__file_stamp = self.__stamp(self.__file_path)
+            if os.path.isdir(self.__shard_dir()):
+                shutil.rmtree(self.__shard_dir())
+                FileStorage.__shard_stamps = {}
+        if len(FileStorage.__serialized) > len(self.__objects):
+            FileStorage.__serialized = {
+                key: cached for key, cached in
+                FileStorage.__serialized.items() if key in self.__objects}
+        if os.path.exists(self.__journal_path()):
+            open(self.__journal_path(), 'w').close()
+        FileStorage.__journal_stamp = self.__stamp(self.__journal_path())
+        FileStorage.__loaded_into = FileStorage.__objects
+        FileStorage.__journal_offset = 0
+        FileStorage.__journal_len = 0
+        FileStorage.__out_of_band = False
+        FileStorage.__pending = {}
+        self.__write_texts()
+
+    def __items(self, codec):
+        """yields the key and encoding of every stored object and record"""
+        for key, obj in self.__objects.items():
+            yield key, self.__serialize(key, obj, codec)
+        for records in FileStorage.__raw.values():
+            for key, record in records.items():
+                yield key, codec.encode(record)
+
+    def __stamp(self, path):
+        """returns the (mtime, size, inode) of path, or None if missing"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def __serialize(self, key, obj, codec):
+        """returns obj encoded by codec, re-encoding it only if obj changed
+        since it was last serialized"""
+        cached = FileStorage.__serialized.get(key)
+        if cached is None or cached[0] is not obj or cached[1] is not codec \
+           or obj in dirty:
+            record = base_model.uncached_dict(obj)
+            cached = (obj, codec, codec.encode(record))
+            FileStorage.__serialized[key] = cached
+            dirty.discard(obj)
+            self.__copy_mutable(key, obj, record)
+        return cached[2]
+
+    def __copy_mutable(self, key, obj, attrs):
+        """keeps copies of the list and dict values of attrs, the
+        attributes of obj, to tell whether they change in place"""
+        values = {name: copy.deepcopy(value) for name, value in attrs.items()
+                  if type(value) in (list, dict)}
+        if values:
+            FileStorage.__mutable[key] = (obj, values)
+        else:
+            FileStorage.__mutable.pop(key, None)
+
+    def __mutated(self):
+        """marks dirty the stored objects whose list or dict values changed
+        in place since they were last serialized"""
+        for key, (obj, values) in list(FileStorage.__mutable.items()):
+            if self.__objects.get(key) is not obj:
+                del FileStorage.__mutable[key]
+                continue
+            if obj not in dirty and any(getattr(obj, name, None) != value
+                                        for name, value in values.items()):
+                dirty.add(obj)
+
+    def __replay(self):
+        """applies the journal records not replayed yet on top of
+        __objects"""
+        stamp = self.__stamp(self.__journal_path())
+        old = FileStorage.__journal_stamp
+        if stamp is None or stamp == old:
+            return
+        if old is None or old[2] != stamp[2] or \
+           stamp[1] < FileStorage.__journal_offset:
+            FileStorage.__journal_offset = 0
+            FileStorage.__journal_len = 0
+        FileStorage.__journal_stamp = stamp
+        with open(self.__journal_path(), 'rb') as f:
+            f.seek(FileStorage.__journal_offset)
+            self.__buckets()
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key, value = record["key"], record["value"]
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                FileStorage.__journal_offset += len(line)
+                FileStorage.__journal_len += 1
+                if FileStorage.__shards:
+                    FileStorage.__dirty_shards.add(self.__shard(key))
+                if value is None:
+                    FileStorage.__pending.pop(key, None)
+                    FileStorage.__raw.get(key.split(".")[0], {}).pop(key,
+                                                                     None)
+                    if self.__objects.pop(key, None) is not None:
+                        self.__unindex(key)
+                else:
+                    self.__load(key, value)
+
+    def __load(self, key, record):
+        """puts a record read from disk in __objects, or keeps it aside in
+        lazy mode until its class is first used"""
+        FileStorage.__pending.pop(key, None)
+        if not FileStorage.__lazy:
+            for key, obj in build([(key, record)]):
+                self.__objects[key] = obj
+                self.__index(key, obj)
+            return
+        if self.__objects.pop(key, None) is not None:
+            self.__unindex(key)
+        FileStorage.__raw.setdefault(key.split(".")[0], {})[key] = \
+            base_model.intern_values(record)
+
+    def __build(self, key):
+        """builds the object of key if it is still kept aside as a
+        record"""
+        records = FileStorage.__raw.get(key.split(".")[0])
+        if records and key in records:
+            self.__buckets()
+            for key, obj in build([(key, records.pop(key))]):
+                self.__objects[key] = obj
+                self.__index(key, obj)
+
+    def __materialize(self, cls=None):
+        """builds the objects still kept aside as records, for the class
+        named cls or for every class"""
+        if not FileStorage.__raw:
+            return
+        if cls is None:
+            names = list(FileStorage.__raw)
+        else:
+            names = [cls]
+        self.__buckets()
+        for name in names:
+            records = FileStorage.__raw.pop(name, {})
+            for key, obj in build(records.items()):
+                self.__objects[key] = obj
+                self.__index(key, obj)
+
+    def __buckets(self):
+        """returns the per-class buckets, rebuilding them if __objects was
+        replaced or changed size behind our back; the records kept aside
+        for the replaced __objects are dropped with it"""
+        if FileStorage.__indexed is not FileStorage.__objects or \
+           FileStorage.__indexed_len != len(FileStorage.__objects):
+            FileStorage.__out_of_band = FileStorage.__indexed is not None
+            if FileStorage.__indexed is not FileStorage.__objects:
+                FileStorage.__raw = {}
+            FileStorage.__by_class = {}
+            FileStorage.__children = {}
+            FileStorage.__parents = {}
+            FileStorage.__names = {}
+            FileStorage.__by_name = {}
+            FileStorage.__children_by_name = {}
+            FileStorage.__ranges = {}
+            FileStorage.__range_values = {}
+            FileStorage.__grids = {}
+            FileStorage.__texts = {}
+            FileStorage.__ordinals = {}
+            FileStorage.__ordinal_keys = {}
+            FileStorage.__free_ordinals = {}
+            FileStorage.__bitmaps = {}
+            FileStorage.__counts = {}
+            FileStorage.__set_values = {}
+            FileStorage.__tables = {}
+            FileStorage.__snapshots = {}
+            FileStorage.__indexed = FileStorage.__objects
+            FileStorage.__indexed_len = 0
+            for key, obj in FileStorage.__objects.items():
+                self.__index(key, obj)
+        return FileStorage.__by_class
+
+    def __index(self, key, obj):
+        """adds obj to the secondary indexes under key"""
+        self.__unindex(key, True)
+        cls = key.split(".")[0]
+        FileStorage.__by_class.setdefault(cls, {})[key] = obj
+        FileStorage.__indexed_len += 1
+        name = self.__sort_name(obj)
+        FileStorage.__names[key] = name
+        if cls in FileStorage.__by_name:
+            bisect.insort(FileStorage.__by_name[cls], (name, key))
+        parents = {}
+        for fk in foreign_keys.get(cls, ()):
+            parents[fk] = getattr(obj, fk, None)
+            group = FileStorage.__children.setdefault(cls + "." + fk, {})
+            group.setdefault(parents[fk], {})[key] = obj
+            ordered = FileStorage.__children_by_name.get(cls + "." + fk, {})
+            if parents[fk] in ordered:
+                bisect.insort(ordered[parents[fk]], (name, key))
+        if parents:
+            FileStorage.__parents[key] = parents
+        if cls in FileStorage.__grids:
+            point = self.__point(cls, obj)
+            if point is not None:
+                FileStorage.__grids[cls].add(key, *point)
+        moved.discard(obj)
+        if FileStorage.__mutable.get(key, (None,))[0] is not obj:
+            self.__copy_mutable(key, obj, base_model.attributes(obj))
+        if cls in FileStorage.__texts:
+            if FileStorage.__texts[cls].add(key, self.__text_of(cls, obj)):
+                FileStorage.__texts_changed = True
+        if cls in range_keys:
+            values = {}
+            for attr in range_keys[cls]:
+                value = getattr(obj, attr, None)
+                if type(value) in (int, float) and value == value:
+                    values[attr] = value
+                    ordered = FileStorage.__ranges.get(cls + "." + attr)
+                    if ordered is not None:
+                        bisect.insort(ordered, (value, key))
+            FileStorage.__range_values[key] = values
+        if cls in set_keys or cls in facet_keys or cls in column_keys:
+            ordinal = self.__ordinal(cls, key)
+            if cls in set_keys or cls in facet_keys:
+                self.__index_sets(cls, key, obj, ordinal)
+            if cls in FileStorage.__tables:
+                FileStorage.__tables[cls].set_row(ordinal, key, obj)
+
+    def __unindex(self, key, moving=False):
+        """removes key from the secondary indexes, but for the text index
+        and ordinal when it is about to be indexed again"""
+        cls = key.split(".")[0]
+        bucket = FileStorage.__by_class.get(cls, {})
+        if bucket.pop(key, None) is None:
+            return
+        if cls in FileStorage.__texts and not moving:
+            FileStorage.__texts[cls].remove(key)
+            FileStorage.__texts_changed = True
+        FileStorage.__indexed_len -= 1
+        name = FileStorage.__names.pop(key, "")
+        if cls in FileStorage.__by_name:
+            self.__unsort(FileStorage.__by_name[cls], name, key)
+        for fk, parent_id in FileStorage.__parents.pop(key, {}).items():
+            group = FileStorage.__children[cls + "." + fk]
+            del group[parent_id][key]
+            if not group[parent_id]:
+                del group[parent_id]
+            ordered = FileStorage.__children_by_name.get(cls + "." + fk, {})
+            if parent_id in ordered:
+                self.__unsort(ordered[parent_id], name, key)
+        if cls in FileStorage.__grids:
+            FileStorage.__grids[cls].remove(key)
+        for attr, value in FileStorage.__range_values.pop(key, {}).items():
+            ordered = FileStorage.__ranges.get(cls + "." + attr)
+            if ordered is not None:
+                self.__unsort(ordered, value, key)
+        if key in FileStorage.__set_values:
+            self.__unindex_sets(cls, key)
+        if not moving and key in FileStorage.__ordinals.get(cls, {}):
+            ordinal = FileStorage.__ordinals[cls].pop(key)
+            FileStorage.__ordinal_keys[cls][ordinal] = None
+            FileStorage.__free_ordinals[cls].append(ordinal)
+            if cls in FileStorage.__tables:
+                FileStorage.__tables[cls].clear_row(ordinal)
+
+    def __sort_name(self, obj):
+        """returns the string obj is sorted under in the name indexes"""
+        name = getattr(obj, "name", None)
+        if name is None:
+            return ""
+        return name if type(name) is str else str(name)
+
+    def __unsort(self, ordered, value, key):
+        """removes (value, key) from the sorted list ordered"""
+        i = bisect.bisect_left(ordered, (value, key))
+        if i < len(ordered) and ordered[i] == (value, key):
+            del ordered[i]
+
+    def __point(self, cls, obj):
+        """returns the (latitude, longitude) of obj, or None if it has no
+        valid coordinates"""
+        lat, lon = (getattr(obj, attr, None) for attr in geo_keys[cls])
+        if type(lat) not in (int, float) or type(lon) not in (int, float) \
+           or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+            return None
+        return lat, lon
+
+    def __grid(self, cls):
+        """returns the geo.Grid of the cls objects"""
+        self.__materialize(cls)
+        self.__buckets()
+        self.__refresh()
+        grid = FileStorage.__grids.get(cls)
+        if grid is None:
+            grid = geo.Grid()
+            for key, obj in FileStorage.__by_class.get(cls, {}).items():
+                point = self.__point(cls, obj)
+                if point is not None:
+                    grid.add(key, *point)
+            FileStorage.__grids[cls] = grid
+        return grid
+
+    def __text_of(self, cls, obj):
+        """returns the text_keys attributes of obj joined together"""
+        values = [getattr(obj, attr, None) for attr in text_keys[cls]]
+        return " ".join(value for value in values if type(value) is str)
+
+    def __text_index(self, cls):
+        """returns the TextIndex of the cls objects"""
+        self.__buckets()
+        index = FileStorage.__texts.get(cls)
+        if index is None:
+            self.__materialize(cls)
+            index = TextIndex()
+            for key, obj in FileStorage.__by_class.get(cls, {}).items():
+                index.add(key, self.__text_of(cls, obj))
+            FileStorage.__texts[cls] = index
+            FileStorage.__texts_changed = True
+        self.__refresh()
+        return index
+
+    def __text_path(self):
+        """returns the path of the text index kept next to the JSON file"""
+        return self.__file_path + ".text"
+
+    def __data_stamp(self):
+        """returns the stamps of the file or shards as they were last read
+        or written, as JSON data"""
+        if self.__sharded():
+            return sorted([name, list(stamp)] for name, stamp in
+                          FileStorage.__shard_stamps.items())
+        if FileStorage.__file_stamp is None:
+            return None
+        return list(FileStorage.__file_stamp)
+
+    def __write_texts(self):
+        """writes the text indexes that changed, with the stamps of the
+        file they index"""
+        if not FileStorage.__texts_changed or not FileStorage.__texts:
+            return
+        data = {"stamp": self.__data_stamp(),
+                "classes": {cls: index.dump() for cls, index in
+                            FileStorage.__texts.items()}}
+        with open(self.__text_path() + ".tmp", 'w') as f:
+            json.dump(data, f)
+        os.replace(self.__text_path() + ".tmp", self.__text_path())
+        FileStorage.__texts_changed = False
+
+    def __read_texts(self):
+        """reads back the text indexes written for the file just read, if
+        it did not change since"""
+        try:
+            with open(self.__text_path()) as f:
+                data = json.load(f)
+            if data["stamp"] is None or data["stamp"] != self.__data_stamp():
+                return
+            FileStorage.__texts = {cls: TextIndex.load(docs) for cls, docs
+                                   in data["classes"].items()
+                                   if cls in text_keys}
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        FileStorage.__texts_changed = False
+
+    def __refresh(self):
+        """re-indexes the stored objects whose foreign_keys, range_keys,
+        geo_keys, text_keys, set_keys or column_keys attributes were
+        assigned to since they were indexed"""
+        for obj in list(moved):
+            key = obj.__class__.__name__ + "." + getattr(obj, "id", "")
+            if self.__objects.get(key) is obj:
+                self.__index(key, obj)
+            else:
+                moved.discard(obj)
+
+    def __in_range(self, cls, triples):
+        """returns the attribute, and the slice of its range index, of the
+        narrowest range filter in triples, or None if there is none"""
+        conditions = {}
+        for name, op, value in triples:
+            if name in range_keys.get(cls, ()) and type(value) in \
+               (int, float) and op in ("eq", "lt", "lte", "gt", "gte"):
+                conditions.setdefault(name, []).append((op, value))
+        if not conditions:
+            return None
+        self.__materialize(cls)
+        self.__buckets()
+        self.__refresh()
+        best = None
+        for attr, ops in conditions.items():
+            ordered = FileStorage.__ranges.get(cls + "." + attr)
+            if ordered is None:
+                ordered = sorted(
+                    (FileStorage.__range_values[key][attr], key)
+                    for key in FileStorage.__by_class.get(cls, {})
+                    if attr in FileStorage.__range_values.get(key, ()))
+                FileStorage.__ranges[cls + "." + attr] = ordered
+            lo, hi = 0, len(ordered)
+            for op, value in ops:
+                first = bisect.bisect_left(ordered, (value,))
+                after = bisect.bisect_left(ordered, (value, greatest))
+                if op in ("eq", "gte"):
+                    lo = max(lo, first)
+                if op == "gt":
+                    lo = max(lo, after)
+                if op in ("eq", "lte"):
+                    hi = min(hi, after)
+                if op == "lt":
+                    hi = min(hi, first)
+            if best is None or hi - lo < best[2] - best[1]:
+                best = (attr, lo, hi, ordered)
+        attr, lo, hi, ordered = best
+        return attr, [self.__objects[key] for value, key in ordered[lo:hi]]
+
+    def __members(self, cls, obj, attr):
+        """returns the set of the values obj is filed under in the attr
+        bitmaps: the items of a set_keys list, or the value, or bucket, of
+        a facet_keys attribute"""
+        values = getattr(obj, attr, None)
+        if attr in set_keys.get(cls, ()):
+            if type(values) not in (list, Tracked, tuple, set, frozenset):
+                return frozenset()
+            return frozenset(value for value in values
+                             if type(value) in (str, int))
+        buckets = facet_keys[cls][attr]
+        if buckets is None:
+            if type(values) not in (str, int):
+                return frozenset()
+            return frozenset([values])
+        if type(values) not in (int, float) or not values >= buckets[0]:
+            return frozenset()
+        return frozenset([buckets[bisect.bisect(buckets, values) - 1]])
+
+    def __ordinal(self, cls, key):
+        """returns the ordinal of key, giving it one, reusing a freed one,
+        if it has none"""
+        ordinals = FileStorage.__ordinals.setdefault(cls, {})
+        ordinal = ordinals.get(key)
+        if ordinal is None:
+            keys = FileStorage.__ordinal_keys.setdefault(cls, [])
+            free = FileStorage.__free_ordinals.setdefault(cls, [])
+            if free:
+                ordinal = free.pop()
+                keys[ordinal] = key
+            else:
+                ordinal = len(keys)
+                keys.append(key)
+            ordinals[key] = ordinal
+        return ordinal
+
+    def __index_sets(self, cls, key, obj, ordinal):
+        """counts key, and sets its ordinal bit in the bitmaps, under the
+        values it is filed under"""
+        values = {}
+        for attr in set_keys.get(cls, ()) + tuple(facet_keys.get(cls, ())):
+            values[attr] = self.__members(cls, obj, attr)
+            counts = FileStorage.__counts.setdefault(cls + "." + attr, {})
+            bitmaps = FileStorage.__bitmaps.get(cls + "." + attr)
+            for value in values[attr]:
+                counts[value] = counts.get(value, 0) + 1
+                if bitmaps is not None:
+                    bitmaps[value] = bitmaps.get(value, 0) | 1 << ordinal
+        FileStorage.__set_values[key] = values
+
+    def __unindex_sets(self, cls, key):
+        """uncounts key, and clears its ordinal bit in the bitmaps"""
+        ordinal = FileStorage.__ordinals[cls][key]
+        for attr, values in FileStorage.__set_values.pop(key).items():
+            counts = FileStorage.__counts[cls + "." + attr]
+            bitmaps = FileStorage.__bitmaps.get(cls + "." + attr)
+            for value in values:
+                counts[value] -= 1
+                if not counts[value]:
+                    del counts[value]
+                if bitmaps is not None:
+                    bitmaps[value] &= ~(1 << ordinal)
+                    if not bitmaps[value]:
+                        del bitmaps[value]
+
+    def __bitmap(self, cls, attr):
+        """returns the value -> bitmap dictionary of the cls attr"""
+        name = cls + "." + attr
+        if name not in FileStorage.__bitmaps:
+            ordinals = FileStorage.__ordinals.get(cls, {})
+            positions = {}
+            for key in FileStorage.__by_class.get(cls, {}):
+                for value in FileStorage.__set_values[key][attr]:
+                    positions.setdefault(value, []).append(ordinals[key])
+            FileStorage.__bitmaps[name] = {
+                value: self.__bits(listing)
+                for value, listing in positions.items()}
+        return FileStorage.__bitmaps[name]
+
+    def __in_sets(self, cls, triples):
+        """returns the objects the bitmaps tell pass the all and any filters
+        of triples, or None if there is none"""
+        found, rest = self.__set_bits(cls, triples)
+        if found is None:
+            return None
+        return self.__decode(cls, found)
+
+    def __set_bits(self, cls, triples):
+        """returns the bitmap of the objects passing the all and any filters
+        of triples (None if there is none), and the other triples"""
+        found = None
+        rest = []
+        for name, op, value in triples:
+            if name not in set_keys.get(cls, ()) or op not in ("all", "any") \
+               or type(value) not in (list, tuple, set, frozenset) or \
+               op == "all" and not value:
+                rest.append((name, op, value))
+                continue
+            if found is None:
+                self.__materialize(cls)
+                self.__buckets()
+                self.__refresh()
+            bitmaps = self.__bitmap(cls, name)
+            bits = None if op == "all" else 0
+            for member in set(value):
+                if op == "any":
+                    bits |= bitmaps.get(member, 0)
+                elif bits is None:
+                    bits = bitmaps.get(member, 0)
+                else:
+                    bits &= bitmaps.get(member, 0)
+            found = bits if found is None else found & bits
+        return found, rest
+
+    def __through_city(self, cls, triples):
+        """returns triples with the state_id filters of places replaced by
+        filters on the ids of the cities they select"""
+        if cls != "Place":
+            return triples
+        found = []
+        for name, op, value in triples:
+            if name == "state_id":
+                cities = [city.id for city in self.all("City").values()
+                          if filters.matches(city, [(name, op, value)])]
+                name, op, value = "city_id", "in", cities
+            found.append((name, op, value))
+        return found
+
+    def __select(self, cls, states, **where):
+        """returns the bitmap of the cls objects passing the query filters
+        of where, where places may also be filtered on the state_id of
+        their city (from states, city id -> state id), or None if there
+        is no filter"""
+        if not where:
+            return None
+        selected = None
+        rest = {}
+        for key, value in where.items():
+            name, _, op = key.partition("__")
+            if name != "state_id" or cls != "Place":
+                rest[key] = value
+                continue
+            op = filters.operators[op or "eq"]
+            bitmaps = self.__bitmap(cls, "city_id")
+            bits = 0
+            for city_id, state_id in states.items():
+                try:
+                    if op(state_id, value):
+                        bits |= bitmaps.get(city_id, 0)
+                except TypeError:
+                    pass
+            selected = bits if selected is None else selected & bits
+        bits, rest = self.__set_bits(cls, filters.parse(rest))
+        if bits is not None:
+            selected = bits if selected is None else selected & bits
+        if rest:
+            ordinals = FileStorage.__ordinals[cls]
+            bits = self.__bits([ordinals[cls + "." + obj.id] for obj in
+                                self.query(cls, **{name + "__" + op: value
+                                                   for name, op, value
+                                                   in rest})])
+            selected = bits if selected is None else selected & bits
+        return selected
+
+    def __bits(self, ordinals):
+        """returns the int bitmap with the bits of ordinals set"""
+        if not ordinals:
+            return 0
+        bits = bytearray(max(ordinals) // 8 + 1)
+        for ordinal in ordinals:
+            bits[ordinal >> 3] |= 1 << (ordinal & 7)
+        return int.from_bytes(bits, "little")
+
+    def __decode(self, cls, bits):
+        """returns the cls objects whose ordinal bits are set in bits"""
+        keys = FileStorage.__ordinal_keys.get(cls, [])
+        # the binary digits, least significant first
+        digits = bin(bits)[:1:-1]
+        objs = []
+        ordinal = digits.find("1")
+        while ordinal != -1:
+            objs.append(self.__objects[keys[ordinal]])
+            ordinal = digits.find("1", ordinal + 1)
+        return objs
+
+    def __in_order(self, ordered):
+        """returns the objects of the sorted [(name, key)] list ordered,
+        first moving the ones renamed since they were indexed"""
+        for name, key in [(name, key) for name, key in ordered
+                          if self.__objects.get(key) is None or
+                          self.__sort_name(self.__objects[key]) != name]:
+            obj = self.__objects.get(key)
+            if obj is None:
+                self.__unindex(key)
+            else:
+                self.__index(key, obj)
+        return [obj for obj in (self.__objects.get(key) for name, key in
+                                ordered) if obj is not None]
+
+    def __ordered(self, cls):
+        """returns the cls objects sorted by name"""
+        self.__materialize(cls)
+        self.__buckets()
+        ordered = FileStorage.__by_name.get(cls)
+        if ordered is None:
+            ordered = sorted((FileStorage.__names[key], key)
+                             for key in FileStorage.__by_class.get(cls, {}))
+            FileStorage.__by_name[cls] = ordered
+        return self.__in_order(ordered)
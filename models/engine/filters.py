@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Filters, ordering and paging shared by the storage engines' query method
+"""
+
+import heapq
+import operator
+
+# comparisons of query filters, named by their suffix as in name__gte=...;
+# all and any test a list attribute for every or any of the given values
+operators = {"eq": operator.eq, "ne": operator.ne, "lt": operator.lt,
+             "lte": operator.le, "gt": operator.gt, "gte": operator.ge,
+             "in": lambda value, values: value in values,
+             "all": lambda values, wanted: set(wanted).issubset(values),
+             "any": lambda values, wanted: not set(wanted).isdisjoint(values)}
+
+
+def parse(filters):
+    """returns the (attribute, operator, value) triples of the keyword
+    filters of a query, raising ValueError on unknown operators"""
+    triples = []
+    for key, value in filters.items():
+        name, _, op = key.partition("__")
+        op = op or "eq"
+        if op not in operators:
+            raise ValueError("unknown filter operator {}".format(op))
+        triples.append((name, op, value))
+    return triples
+
+
+def matches(obj, triples):
+    """tells whether obj passes every filter"""
+    for name, op, value in triples:
+        attr = getattr(obj, name, None)
+        try:
+            if not operators[op](attr, value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def page(objs, order_by=None, offset=0, limit=None):
+    """returns the list of objs sorted by the order_by attribute, descending
+    if it starts with "-", from offset and at most limit long"""
+    end = None if limit is None else offset + limit
+    if order_by:
+        name = order_by.lstrip("-")
+
+        def key(obj):
+            """sorts by the attribute, objects without it last"""
+            value = getattr(obj, name, None)
+            return (value is None, value)
+        if order_by.startswith("-"):
+            if end is not None:
+                objs = heapq.nlargest(end, objs, key)
+            else:
+                objs = sorted(objs, key=key, reverse=True)
+        elif end is not None:
+            objs = heapq.nsmallest(end, objs, key)
+        else:
+            objs = sorted(objs, key=key)
+    else:
+        objs = list(objs)
+    return objs[offset:end]
@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""
+Great-circle distances and the latitude/longitude grid FileStorage uses
+to answer radius and bounding box searches
+"""
+
+import math
+
+# float - mean radius of the Earth in kilometers
+earth_radius = 6371.0088
+# float - kilometers in one degree of latitude
+km_per_degree = math.pi * earth_radius / 180
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """returns the great-circle distance in kilometers between two points
+    given in degrees"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * \
+        math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * earth_radius * math.asin(min(1.0, math.sqrt(a)))
+
+
+def box(lat, lon, km):
+    """returns the (south, west, north, east) box around the circle of km
+    around a point, with west > east if it crosses the antimeridian"""
+    span = km / km_per_degree
+    south, north = max(-90.0, lat - span), min(90.0, lat + span)
+    if south == -90.0 or north == 90.0:
+        return south, -180.0, north, 180.0
+    cos = min(math.cos(math.radians(south)), math.cos(math.radians(north)))
+    span = span / cos
+    if span >= 180:
+        return south, -180.0, north, 180.0
+    west, east = lon - span, lon + span
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
+
+
+def in_box(lat, lon, south, west, north, east):
+    """tells whether a point is in the box, which crosses the antimeridian
+    if west > east"""
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+class Grid:
+    """buckets points into square cells of size degrees (0.1 by default,
+    about 11 km of latitude), so that a search only looks at the points of
+    the cells its box overlaps"""
+    def __init__(self, size=0.1):
+        """makes an empty grid of cells size degrees wide"""
+        self.size = size
+        self.rows = int(math.ceil(180 / size))
+        self.cols = int(math.ceil(360 / size))
+        # dictionary - (row, col) -> {key: (lat, lon)}
+        self.cells = {}
+        # dictionary - key -> (row, col) of its cell
+        self.where = {}
+
+    def __len__(self):
+        """returns the number of points"""
+        return len(self.where)
+
+    def __cell(self, lat, lon):
+        """returns the (row, col) of the cell holding a point"""
+        row = min(int((lat + 90) / self.size), self.rows - 1)
+        col = int((lon + 180) / self.size) % self.cols
+        return row, col
+
+    def add(self, key, lat, lon):
+        """adds or moves the point of key"""
+        if key in self.where:
+            self.remove(key)
+        cell = (min(int((lat + 90) / self.size), self.rows - 1),
+                int((lon + 180) / self.size) % self.cols)
+        self.cells.setdefault(cell, {})[key] = (lat, lon)
+        self.where[key] = cell
+
+    def remove(self, key):
+        """removes the point of key if there is one"""
+        cell = self.where.pop(key, None)
+        if cell is not None:
+            points = self.cells[cell]
+            del points[key]
+            if not points:
+                del self.cells[cell]
+
+    def __overlapping(self, south, west, north, east):
+        """yields the non-empty cells overlapping the box"""
+        first, last = self.__cell(south, 0)[0], self.__cell(north, 0)[0]
+        if west <= east:
+            start, stop = self.__cell(0, west)[1], self.__cell(0, east)[1]
+            if east == 180.0:
+                stop = self.cols - 1
+            cols = range(start, stop + 1)
+        else:
+            cols = set(range(self.__cell(0, west)[1], self.cols)) | \
+                set(range(0, self.__cell(0, east)[1] + 1))
+        if (last - first + 1) * len(cols) > len(self.cells):
+            for (row, col), points in self.cells.items():
+                if first <= row <= last and col in cols:
+                    yield points
+            return
+        for row in range(first, last + 1):
+            for col in cols:
+                points = self.cells.get((row, col))
+                if points is not None:
+                    yield points
+
+    def near(self, lat, lon, km):
+        """returns the sorted (distance, key) pairs of the points within km
+        of a point"""
+        found = []
+        for points in self.__overlapping(*box(lat, lon, km)):
+            for key, (plat, plon) in points.items():
+                distance = haversine(lat, lon, plat, plon)
+                if distance <= km:
+                    found.append((distance, key))
+        found.sort()
+        return found
+
+    def within(self, south, west, north, east):
+        """returns the (distance to the center of the box, key) pairs of
+        the points in the box, sorted"""
+        lat = (south + north) / 2
+        lon = (west + east) / 2
+        if west > east:
+            lon = lon + 180 if lon <= 0 else lon - 180
+        found = []
+        for points in self.__overlapping(south, west, north, east):
+            for key, (plat, plon) in points.items():
+                if in_box(plat, plon, south, west, north, east):
+                    found.append((haversine(lat, lon, plat, plon), key))
+        found.sort()
+        return found
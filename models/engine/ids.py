@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+"""
+The id generators of new instances, and the 16-byte column type DBStorage
+keeps ids in with HBNB_MYSQL_BINARY_IDS=1
+"""
+
+from os import getenv
+import os
+import sqlalchemy
+import threading
+import time
+import uuid
+
+# (integer, integer) - the millisecond and counter of the last uuid7, and
+# the lock guarding them
+last = (0, 0)
+lock = threading.Lock()
+
+
+def uuid4():
+    """returns a new random UUID string"""
+    return str(uuid.uuid4())
+
+
+def uuid7():
+    """returns a new time-ordered UUID string (version 7): 48 bits of Unix
+    milliseconds, a 12-bit counter starting at a random value every
+    millisecond, then 62 random bits, so that the ids a process makes sort
+    in the order it made them"""
+    global last
+    rand = int.from_bytes(os.urandom(10), "big")
+    with lock:
+        ms, counter = last
+        now = time.time_ns() // 1000000
+        if now > ms:
+            ms, counter = now, rand >> 69
+        elif counter < 0xfff:
+            counter += 1
+        else:
+            ms, counter = ms + 1, 0
+        last = (ms, counter)
+    value = ms << 80 | 0x7000 << 64 | counter << 64 | 2 << 62 | \
+        rand & (1 << 62) - 1
+    hexa = "{:032x}".format(value)
+    return "-".join((hexa[:8], hexa[8:12], hexa[12:16], hexa[16:20],
+                     hexa[20:]))
+
+
+# name -> function returning a new string id
+generators = {"uuid4": uuid4, "uuid7": uuid7}
+# the generator new instances take their id from, chosen by
+# HBNB_ID_GENERATOR (uuid4 if unset)
+generate = None
+
+
+def use(generator):
+    """makes new instances take their ids from generator, the name of one
+    of generators or a function returning a new string id"""
+    global generate
+    if type(generator) is str:
+        if generator not in generators:
+            raise ValueError("unknown id generator {}".format(generator))
+        generator = generators[generator]
+    generate = generator
+
+
+use(getenv("HBNB_ID_GENERATOR", "uuid4"))
+
+
+def is_uuid(value):
+    """tells whether value is a UUID string"""
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return True
+
+
+class BinaryUUID(sqlalchemy.types.TypeDecorator):
+    """UUID string ids kept as their 16 bytes, in half the space of
+    String(36) and compared as bytes"""
+    impl = sqlalchemy.types.BINARY
+    cache_ok = True
+
+    def __init__(self):
+        """makes a BINARY(16) column type"""
+        super().__init__(16)
+
+    def process_bind_param(self, value, dialect):
+        """returns the bytes of the UUID string value"""
+        if value is None:
+            return None
+        try:
+            return uuid.UUID(value).bytes
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError("binary ids need UUID strings, not {!r}"
+                             .format(value)) from None
+
+    def process_result_value(self, value, dialect):
+        """returns the UUID string of the bytes value"""
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
+# whether DBStorage keeps ids as BINARY(16) instead of VARCHAR(60)
+binary = getenv("HBNB_MYSQL_BINARY_IDS") == "1"
+
+
+def key_type():
+    """returns the column type of ids and foreign keys: BinaryUUID with
+    HBNB_MYSQL_BINARY_IDS=1, String(60) otherwise"""
+    if binary:
+        return BinaryUUID()
+    return sqlalchemy.String(60)
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Streaming reader and writer for the FileStorage JSON file
+"""
+
+import json
+
+# integer - characters read from the file at a time
+chunk_size = 64 * 1024
+
+decoder = json.JSONDecoder()
+whitespace = " \t\n\r"
+
+
+def read_records(f, size=None):
+    """yields the (key, record) pairs of the JSON object in f one by one,
+    holding at most a few chunks of the file in memory"""
+    if size is None:
+        size = chunk_size
+    buf = ""
+    pos = 0
+    eof = False
+
+    def more():
+        """appends the next chunk of f to the buffer"""
+        nonlocal buf, pos, eof
+        chunk = f.read(size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip():
+        """skips whitespace, returns the next character or '' at the end"""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in whitespace:
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            more()
+
+    def value():
+        """decodes the next JSON value, reading more chunks as needed"""
+        nonlocal pos
+        while True:
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+                more()
+                continue
+            if end == len(buf) and not eof:
+                more()
+                continue
+            pos = end
+            return result
+
+    more()
+    if skip() != "{":
+        raise ValueError("expected a JSON object")
+    pos += 1
+    if skip() == "}":
+        return
+    while True:
+        key = value()
+        if skip() != ":":
+            raise ValueError("expected ':' after {}".format(key))
+        pos += 1
+        skip()
+        record = value()
+        yield key, record
+        sep = skip()
+        pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError("expected ',' or '}' after {}".format(key))
+        skip()
+
+
+def write_records(f, items):
+    """writes the (key, JSON text) pairs of items to f as one JSON object
+    without joining them in memory first"""
+    f.write("{")
+    sep = ""
+    for key, text in items:
+        f.write(sep + json.dumps(key) + ": " + text)
+        sep = ", "
+    f.write("}")
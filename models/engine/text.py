@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""
+Tokenizer and BM25-ranked inverted index for the full-text search of
+FileStorage
+"""
+
+import heapq
+import math
+import re
+
+words = re.compile(r"[^\W_]+")
+tags = re.compile(r"<[^>]*>")
+
+
+def tokenize(text):
+    """returns the lowercase words of text, without its HTML tags"""
+    return words.findall(tags.sub(" ", text).lower())
+
+
+class TextIndex:
+    """maps every word to the documents containing it and how many times,
+    and ranks the documents matching a query with BM25"""
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        """makes an empty index"""
+        # dictionary - document key -> (number of words, {word: count})
+        self.docs = {}
+        # dictionary - word -> {document key: count}
+        self.postings = {}
+        # integer - number of words in every document
+        self.total = 0
+
+    def __len__(self):
+        """returns the number of documents"""
+        return len(self.docs)
+
+    def add(self, key, text):
+        """indexes text as the document key, replacing what key held;
+        tells whether that changed anything"""
+        terms = {}
+        for word in tokenize(text):
+            terms[word] = terms.get(word, 0) + 1
+        if self.docs.get(key, (0, {}))[1] == terms:
+            return False
+        self.remove(key)
+        if terms:
+            self.add_terms(key, sum(terms.values()), terms)
+        return True
+
+    def add_terms(self, key, length, terms):
+        """indexes the already counted words of the document key"""
+        self.docs[key] = (length, terms)
+        self.total += length
+        for word, count in terms.items():
+            self.postings.setdefault(word, {})[key] = count
+
+    def remove(self, key):
+        """removes the document key if it is indexed"""
+        length, terms = self.docs.pop(key, (0, {}))
+        self.total -= length
+        for word in terms:
+            postings = self.postings[word]
+            del postings[key]
+            if not postings:
+                del self.postings[word]
+
+    def search(self, query, limit=None):
+        """returns the (score, key) pairs of the documents containing words
+        of query, best first"""
+        if not self.docs:
+            return []
+        count = len(self.docs)
+        average = self.total / count
+        scores = {}
+        for word in set(tokenize(query)):
+            postings = self.postings.get(word)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) /
+                           (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b *
+                                  self.docs[key][0] / average)
+                scores[key] = scores.get(key, 0) + \
+                    idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = ((-score, key) for key, score in scores.items())
+        if limit is None:
+            ranked = sorted(ranked)
+        else:
+            ranked = heapq.nsmallest(limit, ranked)
+        return [(-score, key) for score, key in ranked]
+
+    def dump(self):
+        """returns the documents as JSON-serializable data"""
+        return {key: [length, terms] for key, (length, terms)
+                in self.docs.items()}
+
+    @classmethod
+    def load(cls, data):
+        """returns the index of documents returned by dump"""
+        index = cls()
+        for key, (length, terms) in data.items():
+            index.add_terms(key, length, terms)
+        return index
@@ -2,18 +2,20 @@
 """class Place"""
 import models
 from models.base_model import BaseModel, Base
+from models.engine import ids
 from os import getenv
 import sqlalchemy
 from sqlalchemy import Column, String, Integer, Float, ForeignKey, Table
+from sqlalchemy import Index
 from sqlalchemy.orm import relationship
 
 if models.storage_t == 'db':
     place_amenity = Table('place_amenity', Base.metadata,
-                          Column('place_id', String(60),
+                          Column('place_id', ids.key_type(),
                                  ForeignKey('places.id', onupdate='CASCADE',
                                             ondelete='CASCADE'),
                                  primary_key=True),
-                          Column('amenity_id', String(60),
+                          Column('amenity_id', ids.key_type(),
                                  ForeignKey('amenities.id', onupdate='CASCADE',
                                             ondelete='CASCADE'),
                                  primary_key=True))
@@ -23,20 +25,28 @@ class Place(BaseModel, Base):
     """Representation of Place """
     if models.storage_t == 'db':
         __tablename__ = 'places'
-        city_id = Column(String(60), ForeignKey('cities.id'), nullable=False)
-        user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
+        __table_args__ = (Index('ix_places_location', 'latitude',
+                                'longitude'),
+                          Index('ix_places_text', 'name', 'description',
+                                mysql_prefix='FULLTEXT'))
+        city_id = Column(ids.key_type(), ForeignKey('cities.id'),
+                         nullable=False)
+        user_id = Column(ids.key_type(), ForeignKey('users.id'),
+                         nullable=False)
         name = Column(String(128), nullable=False)
         description = Column(String(1024), nullable=True)
-        number_rooms = Column(Integer, nullable=False, default=0)
-        number_bathrooms = Column(Integer, nullable=False, default=0)
-        max_guest = Column(Integer, nullable=False, default=0)
-        price_by_night = Column(Integer, nullable=False, default=0)
+        number_rooms = Column(Integer, nullable=False, default=0, index=True)
+        number_bathrooms = Column(Integer, nullable=False, default=0,
+                                  index=True)
+        max_guest = Column(Integer, nullable=False, default=0, index=True)
+        price_by_night = Column(Integer, nullable=False, default=0,
+                                index=True)
         latitude = Column(Float, nullable=True)
         longitude = Column(Float, nullable=True)
         reviews = relationship("Review", backref="place")
         amenities = relationship("Amenity", secondary="place_amenity",
                                  backref="place_amenities",
-                                 viewonly=False)
+                                 order_by="Amenity.name", viewonly=False)
     else:
         city_id = ""
         user_id = ""
@@ -59,20 +69,19 @@ class Place(BaseModel, Base):
         def reviews(self):
             """getter attribute returns the list of Review instances"""
             from models.review import Review
-            review_list = []
-            all_reviews = models.storage.all(Review)
-            for review in all_reviews.values():
-                if review.place_id == self.id:
-                    review_list.append(review)
-            return review_list
+            return models.storage.children(Review, "place_id", self.id)
 
         @property
         def amenities(self):
             """getter attribute returns the list of Amenity instances"""
             from models.amenity import Amenity
-            amenity_list = []
-            all_amenities = models.storage.all(Amenity)
-            for amenity in all_amenities.values():
-                if amenity.place_id == self.id:
-                    amenity_list.append(amenity)
-            return amenity_list
+            return models.storage.query(Amenity, id__in=self.amenity_ids,
+                                        order_by="name")
+
+        @amenities.setter
+        def amenities(self, obj):
+            """setter attribute adds the id of an Amenity to amenity_ids,
+            assigning a new list so that storage re-indexes the place"""
+            from models.amenity import Amenity
+            if type(obj) is Amenity and obj.id not in self.amenity_ids:
+                self.amenity_ids = self.amenity_ids + [obj.id]
@@ -2,17 +2,22 @@
 """class Review"""
 import models
 from models.base_model import BaseModel, Base
+from models.engine import ids
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 
 
 class Review(BaseModel, Base):
     """Representation of Review """
     if models.storage_t == 'db':
         __tablename__ = 'reviews'
-        place_id = Column(String(60), ForeignKey('places.id'), nullable=False)
-        user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
+        __table_args__ = (Index('ix_reviews_text', 'text',
+                                mysql_prefix='FULLTEXT'),)
+        place_id = Column(ids.key_type(), ForeignKey('places.id'),
+                          nullable=False)
+        user_id = Column(ids.key_type(), ForeignKey('users.id'),
+                         nullable=False)
         text = Column(String(1024), nullable=False)
     else:
         place_id = ""
@@ -3,7 +3,10 @@
 from datetime import datetime
 import inspect
 import models
+import os
 import pep8 as pycodestyle
+import subprocess
+import sys
 import time
 import unittest
 from unittest import mock
@@ -158,3 +161,95 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.new.called)
         self.assertTrue(mock_storage.save.called)
+
+    def test_dirty(self):
+        """Test that setting or deleting an attribute marks the instance,
+        but not making it"""
+        inst = BaseModel()
+        self.assertNotIn(inst, models.base_model.dirty)
+        inst = BaseModel(id="1", name="Holberton")
+        self.assertNotIn(inst, models.base_model.dirty)
+        self.assertNotIn(inst, models.base_model.moved)
+        inst.name = "Holberton"
+        self.assertIn(inst, models.base_model.dirty)
+        models.base_model.dirty.discard(inst)
+        del inst.name
+        self.assertIn(inst, models.base_model.dirty)
+
+    def test_serialized_cache(self):
+        """Test that to_dict and str are cached until an attribute is set
+        or deleted"""
+        inst = BaseModel(name="Holberton")
+        first = inst.to_dict()
+        first["name"] = "changed"
+        self.assertEqual(inst.to_dict()["name"], "Holberton")
+        self.assertIs(str(inst), str(inst))
+        inst.name = "School"
+        self.assertEqual(inst.to_dict()["name"], "School")
+        self.assertIn("'School'", str(inst))
+        del inst.name
+        self.assertNotIn("name", inst.to_dict())
+        self.assertNotIn("School", str(inst))
+        models.base_model.restore(inst, {"id": "1", "name": "Restored"})
+        self.assertEqual(inst.to_dict(), {"id": "1", "name": "Restored",
+                                          "__class__": "BaseModel"})
+
+    def test_serialized_cache_skips_lists(self):
+        """Test that to_dict and str follow the lists changed in place"""
+        inst = BaseModel(tags=[])
+        self.assertEqual(inst.to_dict()["tags"], [])
+        self.assertIn("[]", str(inst))
+        inst.tags.append("wifi")
+        self.assertEqual(inst.to_dict()["tags"], ["wifi"])
+        self.assertIn("['wifi']", str(inst))
+        self.assertNotIn(inst, models.base_model.serialized)
+
+    def test_from_dict(self):
+        """Test that from_dict and from_dicts build what __init__ does from
+        to_dict() records"""
+        inst = BaseModel(name="Holberton", number=89)
+        copy = BaseModel.from_dict(inst.to_dict())
+        self.assertIs(type(copy), BaseModel)
+        self.assertEqual(copy.to_dict(), inst.to_dict())
+        self.assertEqual(copy.created_at, inst.created_at)
+        self.assertIs(type(copy.updated_at), datetime)
+        self.assertNotIn(copy, models.base_model.dirty)
+        records = [inst.to_dict(), {"name": "new"},
+                   dict(inst.to_dict(), created_at=inst.created_at)]
+        copies = BaseModel.from_dicts(records)
+        self.assertEqual(len(copies), 3)
+        self.assertEqual(copies[0].id, inst.id)
+        self.assertEqual(copies[1].name, "new")
+        self.assertIs(type(copies[1].created_at), datetime)
+        self.assertIs(type(copies[1].id), str)
+        self.assertEqual(copies[2].created_at, inst.created_at)
+
+    def test_datetime_kwargs(self):
+        """Test that datetime values passed as kwargs are kept"""
+        created = datetime(2017, 9, 28, 21, 3, 54, 52298)
+        inst = BaseModel(created_at=created, updated_at=created)
+        self.assertEqual(inst.created_at, created)
+        self.assertEqual(inst.updated_at, created)
+
+    def test_compact(self):
+        """Test that HBNB_FILE_COMPACT=1 models keep their API without a
+        per-instance dictionary"""
+        script = "\n".join([
+            "import pickle, sys",
+            "from models.place import Place",
+            "place = Place(name='Home', extra=1)",
+            "assert Place.__dictoffset__ == 0",
+            "assert place.city_id == '' and place.extra == 1",
+            "assert place.__dict__ == dict({k: v for k, v in"
+            " place.to_dict().items() if k not in ('__class__',"
+            " 'created_at', 'updated_at')}, created_at=place.created_at,"
+            " updated_at=place.updated_at)",
+            "assert str(place).startswith('[Place] (' + place.id)",
+            "copy = pickle.loads(pickle.dumps(place))",
+            "assert copy.to_dict() == place.to_dict()",
+            "del place.extra",
+            "assert not hasattr(place, 'extra')",
+        ])
+        env = dict(os.environ, HBNB_FILE_COMPACT="1")
+        env.pop("HBNB_TYPE_STORAGE", None)
+        subprocess.run([sys.executable, "-c", script], env=env, check=True)
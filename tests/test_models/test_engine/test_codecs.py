@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+"""
+Contains the TestCodecsDocs and TestCodecs classes
+"""
+
+from datetime import datetime
+import inspect
+import io
+import json
+import models
+from models.engine import codecs
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.state import State
+import os
+import pep8
+import unittest
+
+
+class TestCodecsDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the codecs module"""
+    def test_pep8_conformance_codecs(self):
+        """Test that models/engine/codecs.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/codecs.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_codecs(self):
+        """Test tests/test_models/test_engine/test_codecs.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_codecs.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_codecs_module_docstring(self):
+        """Test for the codecs.py module docstring"""
+        self.assertIsNot(codecs.__doc__, None,
+                         "codecs.py needs a docstring")
+        self.assertTrue(len(codecs.__doc__) >= 1,
+                        "codecs.py needs a docstring")
+
+    def test_codecs_docstrings(self):
+        """Test for the presence of docstrings in codecs classes"""
+        funcs = inspect.getmembers(codecs, inspect.isfunction)
+        for cls in [codecs.JSONCodec, codecs.BinaryCodec]:
+            self.assertTrue(len(cls.__doc__) >= 1,
+                            "{:s} needs a docstring".format(cls.__name__))
+            funcs += inspect.getmembers(cls, inspect.isfunction)
+        for func in funcs:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestCodecs(unittest.TestCase):
+    """Test the codecs module"""
+    record = {"id": "1234", "created_at": "2017-09-28T21:03:54.052298",
+              "updated_at": "2017-09-28T21:03:54.052302", "name": "Loft",
+              "max_guest": 4, "latitude": 37.77, "description": None,
+              "amenity_ids": ["a", "b"], "pets": True, "é": "ü",
+              "__class__": "Place"}
+
+    def round_trip(self, codec):
+        """returns the records codec reads back after writing record"""
+        f = io.BytesIO()
+        codec.write(f, [("Place.1234", codec.encode(self.record))])
+        f.seek(0)
+        self.assertIs(codecs.detect(f), codec)
+        return list(codec.read(f))
+
+    def test_json(self):
+        """Test that the JSON codec reads back what it wrote"""
+        self.assertEqual(self.round_trip(codecs.codecs["json"]),
+                         [("Place.1234", self.record)])
+
+    def test_binary(self):
+        """Test that the binary codec reads back typed values"""
+        [(key, record)] = self.round_trip(codecs.codecs["binary"])
+        self.assertEqual(key, "Place.1234")
+        self.assertEqual(record["created_at"],
+                         datetime(2017, 9, 28, 21, 3, 54, 52298))
+        expected = dict(self.record)
+        del expected["created_at"], expected["updated_at"]
+        del record["created_at"], record["updated_at"]
+        self.assertEqual(record, expected)
+
+    def test_binary_is_smaller(self):
+        """Test that the binary codec writes fewer bytes than JSON"""
+        sizes = []
+        for codec in codecs.codecs.values():
+            f = io.BytesIO()
+            codec.write(f, [("Place.{}".format(i), codec.encode(self.record))
+                            for i in range(100)])
+            sizes.append(len(f.getvalue()))
+        self.assertLess(sizes[1], sizes[0])
+
+    def test_json_encodes_datetimes(self):
+        """Test that records read by the binary codec can be written as
+        JSON"""
+        text = codecs.codecs["json"].encode(
+            {"created_at": datetime(2017, 9, 28, 21, 3, 54, 52298)})
+        self.assertEqual(json.loads(text),
+                         {"created_at": "2017-09-28T21:03:54.052298"})
+
+    def test_binary_truncated(self):
+        """Test that the binary codec rejects a truncated file"""
+        codec = codecs.codecs["binary"]
+        f = io.BytesIO()
+        codec.write(f, [("Place.1234", codec.encode(self.record))])
+        with self.assertRaises(ValueError):
+            list(codec.read(io.BytesIO(f.getvalue()[:-1])))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_file_storage_switches_codec(self):
+        """Test that FileStorage writes with the configured codec and
+        detects the codec of the file it reloads"""
+        saved = (FileStorage._FileStorage__objects,
+                 FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__journal,
+                 FileStorage._FileStorage__shards)
+        FileStorage._FileStorage__file_path = "test_codecs.db"
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__shards = 0
+        try:
+            storage = FileStorage()
+            place = Place(name="Loft", max_guest=4)
+            state = State(name="California")
+            for codec in ["binary", "json"]:
+                FileStorage._FileStorage__objects = {}
+                storage.new(place)
+                storage.new(state)
+                FileStorage._FileStorage__codec = codec
+                storage.save()
+                FileStorage._FileStorage__codec = "json"
+                FileStorage._FileStorage__objects = {}
+                storage.reload()
+                stored = storage.all()["Place." + place.id]
+                self.assertEqual(stored.to_dict(), place.to_dict())
+                self.assertEqual(len(storage.all()), 2)
+        finally:
+            FileStorage._FileStorage__codec = "json"
+            (FileStorage._FileStorage__objects,
+             FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__journal,
+             FileStorage._FileStorage__shards) = saved
+            os.remove("test_codecs.db")
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""
+Contains the TestColumnsDocs and TestColumns classes
+"""
+
+import inspect
+from models.engine import columns
+import pep8
+import unittest
+
+
+class TestColumnsDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the columns module"""
+    def test_pep8_conformance_columns(self):
+        """Test that models/engine/columns.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/columns.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_columns(self):
+        """Test tests/test_models/test_engine/test_columns.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_columns.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_columns_module_docstring(self):
+        """Test for the columns.py module docstring"""
+        self.assertIsNot(columns.__doc__, None,
+                         "columns.py needs a docstring")
+        self.assertTrue(len(columns.__doc__) >= 1,
+                        "columns.py needs a docstring")
+
+    def test_columns_func_docstrings(self):
+        """Test for the presence of docstrings in columns functions"""
+        funcs = inspect.getmembers(columns, inspect.isfunction)
+        for cls in [columns.Table, columns.Snapshot, columns.Values]:
+            funcs += inspect.getmembers(cls, inspect.isfunction)
+        for func in funcs:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+@unittest.skipIf(columns.numpy is None, "numpy is not installed")
+class TestColumns(unittest.TestCase):
+    """Test the columns module"""
+    def setUp(self):
+        """Make a snapshot of a few rows"""
+        self.snapshot = columns.Snapshot.from_rows(
+            [("Place.1", {"price": 100, "city_id": "sf"}),
+             ("Place.2", {"price": 50, "city_id": "la"}),
+             ("Place.3", {"price": None, "city_id": "sf"}),
+             ("Place.4", {"price": 70, "city_id": None}),
+             ("Place.5", {"price": 30, "city_id": "sf"})],
+            ("price",), ("city_id",))
+
+    def test_snapshot(self):
+        """Test that rows become read-only columns"""
+        self.assertEqual(len(self.snapshot), 5)
+        self.assertEqual(list(self.snapshot.keys),
+                         ["Place." + str(i) for i in range(1, 6)])
+        self.assertEqual(list(self.snapshot.values("city_id")),
+                         ["sf", "la", "sf", None, "sf"])
+        self.assertTrue(columns.numpy.isnan(self.snapshot["price"][2]))
+        with self.assertRaises(ValueError):
+            self.snapshot["price"][0] = 1
+
+    def test_filter(self):
+        """Test that filter keeps the rows passing every filter"""
+        found = self.snapshot.filter(price__gte=50, city_id__ne="la")
+        self.assertEqual(list(found.keys), ["Place.1", "Place.4"])
+        found = self.snapshot.filter(city_id__in=["la", "ny"])
+        self.assertEqual(list(found.keys), ["Place.2"])
+        self.assertEqual(len(self.snapshot.filter(city_id="ny")), 0)
+        with self.assertRaises(ValueError):
+            self.snapshot.filter(city_id__gt="a")
+
+    def test_stats_group(self):
+        """Test the aggregates, which leave out missing values"""
+        self.assertEqual(self.snapshot.stats("price"),
+                         {"count": 4, "sum": 250.0, "mean": 62.5,
+                          "min": 30.0, "max": 100.0})
+        self.assertEqual(self.snapshot.group("city_id"), {"sf": 3, "la": 1})
+        self.assertEqual(self.snapshot.group("city_id", "price", "mean"),
+                         {"sf": 65.0, "la": 50.0})
+        self.assertEqual(self.snapshot.group("city_id", "price", "min"),
+                         {"sf": 30.0, "la": 50.0})
+        self.assertEqual(self.snapshot.group("city_id", "price", "max"),
+                         {"sf": 100.0, "la": 50.0})
+        with self.assertRaises(ValueError):
+            self.snapshot.group("city_id", how="sum")
+
+    def test_join(self):
+        """Test that join maps a string column through a dictionary"""
+        found = self.snapshot.join("state_id", "city_id",
+                                   {"sf": "ca", "la": "ca"})
+        self.assertEqual(found.group("state_id", "price", "sum"),
+                         {"ca": 180.0})
+        self.assertEqual(list(found.values("state_id")),
+                         ["ca", "ca", "ca", None, "ca"])
+
+    def test_table(self):
+        """Test that table rows can be rewritten and cleared"""
+        table = columns.Table(("price",), ("city_id",))
+        for row in range(100):
+            table.set_row(row, str(row), columns.Values(
+                {"price": row, "city_id": "sf"}))
+        table.clear_row(3)
+        table.set_row(7, "7", columns.Values({"price": 1.5}))
+        snapshot = table.snapshot()
+        self.assertEqual(len(snapshot), 99)
+        self.assertNotIn("3", list(snapshot.keys))
+        self.assertEqual(snapshot.filter(price__lt=2).group("city_id"),
+                         {"sf": 2})
+        self.assertEqual(snapshot["price"][6], 1.5)
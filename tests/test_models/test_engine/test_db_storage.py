@@ -6,7 +6,7 @@ TestDBStorageDocs and TestDBStorage classes
 from datetime import datetime
 import inspect
 import models
-from models.engine import db_storage
+from models.engine import columns, db_storage
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -86,3 +86,138 @@ class TestFileStorage(unittest.TestCase):
     @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
     def test_save(self):
         """Test that save properly saves objects to file.json"""
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestDBStorageQueries(unittest.TestCase):
+    """Test the lookups and queries of the DBStorage class"""
+    def setUp(self):
+        """Store a state with two cities, a user, two places, an amenity
+        and a review"""
+        self.state = State(name="California")
+        self.city = City(name="San Francisco", state_id=self.state.id)
+        self.other = City(name="Oakland", state_id=self.state.id)
+        self.user = User(email="guest@hbnb.io", password="pwd")
+        self.wifi = Amenity(name="Wifi")
+        self.places = [
+            Place(name="Lighthouse loft", city_id=self.city.id,
+                  user_id=self.user.id, price_by_night=80, max_guest=2,
+                  latitude=37.77, longitude=-122.42,
+                  description="ocean view from the lighthouse"),
+            Place(name="Harbor house", city_id=self.other.id,
+                  user_id=self.user.id, price_by_night=250, max_guest=6,
+                  latitude=37.80, longitude=-122.27)]
+        self.places[0].amenities.append(self.wifi)
+        self.review = Review(text="Wonderful lighthouse stay",
+                             place_id=self.places[0].id,
+                             user_id=self.user.id)
+        self.rows = [self.state, self.city, self.other, self.user,
+                     self.wifi] + self.places + [self.review]
+        for row in self.rows:
+            models.storage.new(row)
+        models.storage.save()
+
+    def tearDown(self):
+        """Remove the stored rows"""
+        for row in reversed(self.rows):
+            models.storage.delete(row)
+        models.storage.save()
+
+    def ids(self, rows):
+        """returns the ids of the rows stored by setUp, in order"""
+        ours = set(row.id for row in self.rows)
+        return [row.id for row in rows if row.id in ours]
+
+    def test_get(self):
+        """Test that get returns the row of the class and id, or None"""
+        place = self.places[0]
+        self.assertIs(models.storage.get(Place, place.id), place)
+        self.assertIs(models.storage.get("Place", place.id), place)
+        self.assertIsNone(models.storage.get(City, place.id))
+        self.assertIsNone(models.storage.get("NoSuchClass", place.id))
+
+    def test_count(self):
+        """Test that count counts the rows of every table or of a class,
+        and none of an unknown class"""
+        self.assertEqual(models.storage.count(Place),
+                         len(models.storage.all(Place)))
+        self.assertEqual(models.storage.count("City"),
+                         len(models.storage.all(City)))
+        self.assertEqual(models.storage.count(),
+                         len(models.storage.all()))
+        self.assertEqual(models.storage.count("NoSuchClass"), 0)
+
+    def test_query(self):
+        """Test that query filters, sorts and pages in SQL"""
+        storage = models.storage
+        self.assertEqual(self.ids(storage.query(Place,
+                                                price_by_night__lt=100)),
+                         [self.places[0].id])
+        self.assertEqual(self.ids(storage.query(Place, order_by="name",
+                                                state_id=self.state.id)),
+                         [self.places[1].id, self.places[0].id])
+        self.assertEqual(self.ids(storage.query(
+            Place, amenity_ids__all=[self.wifi.id])), [self.places[0].id])
+        self.assertEqual(self.ids(storage.query(
+            City, order_by="-name", state_id=self.state.id, limit=1)),
+            [self.city.id])
+        self.assertEqual(storage.query("NoSuchClass"), [])
+
+    def test_batch(self):
+        """Test that a batch commits once, or rolls back if it raises"""
+        storage = models.storage
+        nevada = State(name="Nevada")
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                storage.new(nevada)
+                raise KeyError
+        self.assertIsNone(storage.get(State, nevada.id))
+        with storage.batch():
+            storage.new(nevada)
+            storage.save()
+        self.assertIs(storage.get(State, nevada.id), nevada)
+        self.rows.append(nevada)
+
+    def test_near_within(self):
+        """Test the radius and box searches over places"""
+        storage = models.storage
+        self.assertEqual(self.ids(storage.near(Place, 37.77, -122.42, 5)),
+                         [self.places[0].id])
+        self.assertEqual(self.ids(storage.near(Place, 37.77, -122.42, 20)),
+                         [self.places[0].id, self.places[1].id])
+        self.assertEqual(self.ids(storage.within(Place, 37.7, -122.3, 37.9,
+                                                 -122.2)),
+                         [self.places[1].id])
+        self.assertEqual(storage.near(City, 37.77, -122.42, 5), [])
+
+    def test_search(self):
+        """Test the full-text search over places and reviews"""
+        storage = models.storage
+        self.assertEqual(self.ids(storage.search(Place, "lighthouse")),
+                         [self.places[0].id])
+        self.assertEqual(self.ids(storage.search("Review", "lighthouse")),
+                         [self.review.id])
+        self.assertEqual(storage.search(State, "lighthouse"), [])
+
+    @unittest.skipIf(columns.numpy is None, "numpy is not installed")
+    def test_columns(self):
+        """Test the columnar snapshot of the places"""
+        snapshot = models.storage.columns(Place)
+        keys = list(snapshot.keys)
+        row = keys.index("Place." + self.places[1].id)
+        self.assertEqual(snapshot["price_by_night"][row], 250)
+        self.assertEqual(snapshot.values("state_id")[row], self.state.id)
+        with self.assertRaises(ValueError):
+            models.storage.columns(State)
+
+    def test_facets(self):
+        """Test the facet counts of the places of a state"""
+        facets = models.storage.facets(Place, state_id=self.state.id)
+        self.assertEqual(facets["city_id"], {self.city.id: 1,
+                                             self.other.id: 1})
+        self.assertEqual(facets["amenity_ids"], {self.wifi.id: 1})
+        self.assertEqual(facets["price_by_night"], {50: 1, 200: 1})
+        self.assertEqual(models.storage.facets(Place)["state_id"]
+                         [self.state.id], 2)
+        with self.assertRaises(ValueError):
+            models.storage.facets(State)
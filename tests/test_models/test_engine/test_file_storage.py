@@ -17,7 +17,11 @@ from models.user import User
 import json
 import os
 import pep8
+import shutil
+import sys
 import unittest
+from unittest import mock
+import zlib
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -70,6 +74,22 @@ test_file_storage.py'])
 
 class TestFileStorage(unittest.TestCase):
     """Test the FileStorage class"""
+    def setUp(self):
+        """Pin the storage to a single file, whatever the HBNB_FILE_*
+        variables turned on"""
+        self.modes = (FileStorage._FileStorage__journal,
+                      FileStorage._FileStorage__shards,
+                      FileStorage._FileStorage__lazy)
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__shards = 0
+        FileStorage._FileStorage__lazy = False
+
+    def tearDown(self):
+        """Restore the storage modes"""
+        (FileStorage._FileStorage__journal,
+         FileStorage._FileStorage__shards,
+         FileStorage._FileStorage__lazy) = self.modes
+
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_all_returns_dict(self):
         """Test that all returns the FileStorage.__objects attr"""
@@ -113,3 +133,960 @@ class TestFileStorage(unittest.TestCase):
         with open("file.json", "r") as f:
             js = f.read()
         self.assertEqual(json.loads(string), json.loads(js))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_cls(self):
+        """Test that all(cls) only returns objects of that class"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        state = State()
+        city = City()
+        storage.new(state)
+        storage.new(city)
+        self.assertEqual(storage.all(State), {"State." + state.id: state})
+        self.assertEqual(storage.all("City"), {"City." + city.id: city})
+        self.assertEqual(storage.all(Amenity), {})
+        storage.delete(state)
+        self.assertEqual(storage.all(State), {})
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_cls_follows_objects(self):
+        """Test that all(cls) notices __objects being replaced or edited"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        state = State()
+        FileStorage._FileStorage__objects = {"State." + state.id: state}
+        self.assertEqual(storage.all(State), {"State." + state.id: state})
+        storage.all().pop("State." + state.id)
+        self.assertEqual(storage.all(State), {})
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_children(self):
+        """Test that children follows new, delete and foreign key changes"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        ca = State(name="California")
+        nv = State(name="Nevada")
+        city = City(name="Fremont", state_id=ca.id)
+        for obj in [ca, nv, city]:
+            storage.new(obj)
+        self.assertEqual(storage.children(City, "state_id", ca.id), [city])
+        self.assertEqual(ca.cities, [city])
+        city.state_id = nv.id
+        self.assertEqual(ca.cities, [])
+        self.assertEqual(nv.cities, [city])
+        storage.delete(city)
+        self.assertEqual(nv.cities, [])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_sorted_by_name(self):
+        """Test that the name indexes follow new, delete and renames"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        ca = State(name="California")
+        cities = [City(name=name, state_id=ca.id)
+                  for name in ["Salem", "Fremont", "Oakland"]]
+        for obj in [ca] + cities:
+            storage.new(obj)
+        self.assertEqual([c.name for c in ca.cities],
+                         ["Fremont", "Oakland", "Salem"])
+        self.assertEqual([c.name for c in storage.query(City,
+                                                        order_by="name")],
+                         ["Fremont", "Oakland", "Salem"])
+        storage.new(City(name="Berkeley", state_id=ca.id))
+        cities[0].name = "Alameda"
+        storage.delete(cities[2])
+        self.assertEqual([c.name for c in ca.cities],
+                         ["Alameda", "Berkeley", "Fremont"])
+        self.assertEqual([c.name for c in storage.query(City,
+                                                        order_by="-name")],
+                         ["Fremont", "Berkeley", "Alameda"])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_reuses_clean_objects(self):
+        """Test that save only re-serializes objects that changed"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        state = State(name="California")
+        storage.new(state)
+        storage.save()
+        self.assertNotIn(state, models.base_model.serialized)
+        state.__dict__["name"] = "not seen"
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"],
+                             "California")
+        state.name = "Nevada"
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"],
+                             "Nevada")
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_in_place_change(self):
+        """Test that save writes the lists changed in place"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        place = Place(name="Home", amenity_ids=[])
+        storage.new(place)
+        storage.save()
+        place.amenity_ids.append("wifi")
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)["Place." + place.id]["amenity_ids"],
+                             ["wifi"])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_interns_foreign_keys(self):
+        """Test that the foreign keys of loaded and changed objects are
+        shared strings"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        place = Place(name="Home", amenity_ids=["-".join(["a", "1"])])
+        for i in range(2):
+            storage.new(Review(place_id="-".join(["p", "1"]),
+                               user_id="u", text=str(i)))
+        storage.new(place)
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        first, second = storage.all(Review).values()
+        self.assertEqual(first.place_id, "p-1")
+        self.assertIs(first.place_id, second.place_id)
+        loaded = storage.get(Place, place.id)
+        self.assertIs(loaded.amenity_ids[0], sys.intern("a-1"))
+        first.user_id = "-".join(["u", "2"])
+        self.assertIs(first.user_id, sys.intern("u-2"))
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_build_untrusted_records(self):
+        """Test that records without dates go through __init__, and that
+        building stops at the first record with unreadable dates"""
+        records = [State(name=name).to_dict() for name in "ABCD"]
+        records[1]["created_at"] = None
+        records[2]["created_at"] = "yesterday"
+        built = list(file_storage.build(("State." + record["id"], record)
+                                        for record in records))
+        self.assertEqual([obj.name for key, obj in built], ["A", "B"])
+        self.assertIs(type(built[1][1].created_at), datetime)
+        self.assertEqual(built[1][1].to_dict()["updated_at"],
+                         records[1]["updated_at"])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_untrusted_records(self):
+        """Test that reload keeps the records before the first one with
+        unreadable dates"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        records = [State(name=name).to_dict() for name in "ABCD"]
+        records[1]["created_at"] = None
+        records[2]["created_at"] = "yesterday"
+        with open("file.json", "w") as f:
+            json.dump({"State." + record["id"]: record
+                       for record in records}, f)
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(sorted(obj.name for obj in storage.all().values()),
+                         ["A", "B"])
+        storage.get(State, records[1]["id"]).save()
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_get(self):
+        """Test that get returns the object with the id, or None"""
+        storage = FileStorage()
+        state = State(name="California")
+        storage.new(state)
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertIs(storage.get("State", state.id), state)
+        self.assertIsNone(storage.get(City, state.id))
+        self.assertIsNone(storage.get(State, "missing"))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_count(self):
+        """Test that count counts every object, or those of a class"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        storage.new(State(name="California"))
+        storage.new(State(name="Nevada"))
+        storage.new(User())
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count(State), 2)
+        self.assertEqual(storage.count("User"), 1)
+        self.assertEqual(storage.count(City), 0)
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_query(self):
+        """Test that query filters, sorts and slices the objects of a class"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        states = [State(name=name) for name in ["Oregon", "Alaska", "Texas"]]
+        for state in states:
+            storage.new(state)
+        for name in ["Salem", "Portland"]:
+            storage.new(City(name=name, state_id=states[0].id))
+        storage.new(City(name="Austin", state_id=states[2].id))
+        names = [s.name for s in storage.query(State, order_by="name")]
+        self.assertEqual(names, ["Alaska", "Oregon", "Texas"])
+        names = [s.name for s in storage.query("State", order_by="-name",
+                                               limit=1, offset=1)]
+        self.assertEqual(names, ["Oregon"])
+        names = [s.name for s in storage.query(State, name__gt="B")]
+        self.assertCountEqual(names, ["Oregon", "Texas"])
+        self.assertEqual(storage.query(State, id=states[1].id), [states[1]])
+        names = [c.name for c in storage.query(City, state_id=states[0].id,
+                                               order_by="name")]
+        self.assertEqual(names, ["Portland", "Salem"])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_query_foreign_key_assigned(self):
+        """Test that foreign key queries follow assignments made without
+        new() or save()"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        ca, nv = State(name="California"), State(name="Nevada")
+        city, other = City(name="Fremont", state_id=ca.id), \
+            City(name="Reno", state_id=nv.id)
+        place = Place(name="Home", city_id=city.id)
+        for obj in [ca, nv, city, other, place]:
+            storage.new(obj)
+        place.city_id = other.id
+        self.assertEqual(storage.query(Place, city_id=city.id), [])
+        self.assertEqual(storage.query(Place, city_id=other.id), [place])
+        other.state_id = ca.id
+        self.assertEqual(storage.query(Place, state_id=ca.id), [place])
+        self.assertEqual(storage.query(Place, state_id=nv.id), [])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_query_range(self):
+        """Test that range queries follow new, delete and assignments"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        places = [Place(name=str(price), price_by_night=price,
+                        max_guest=price % 4) for price in range(0, 100, 10)]
+        for place in places:
+            storage.new(place)
+
+        def names(**where):
+            """returns the names of the places query returns"""
+            return [p.name for p in storage.query(Place, **where)]
+        self.assertEqual(names(price_by_night__gte=30, price_by_night__lt=60,
+                               order_by="price_by_night"),
+                         ["30", "40", "50"])
+        self.assertEqual(names(price_by_night__gt=30, max_guest__gte=2,
+                               order_by="name"), ["50", "70", "90"])
+        self.assertEqual(names(price_by_night=40), ["40"])
+        places[5].price_by_night = 45
+        storage.delete(places[4])
+        storage.new(Place(name="35", price_by_night=35))
+        self.assertEqual(names(price_by_night__gte=30, price_by_night__lte=50,
+                               order_by="-price_by_night"),
+                         ["50", "35", "30"])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_query_amenities(self):
+        """Test that amenity filters follow the places' amenity lists"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        wifi, pool, sauna = (Amenity(name=name) for name in
+                             ["Wifi", "Pool", "Sauna"])
+        places = [Place(name=str(i)) for i in range(6)]
+        for obj in [wifi, pool, sauna] + places:
+            storage.new(obj)
+        for place in places:
+            place.amenities = wifi
+        for place in places[::2]:
+            place.amenities = pool
+        places[1].amenity_ids = [sauna.id]
+
+        def names(**where):
+            """returns the names of the places passing the filters"""
+            return [place.name for place in
+                    storage.query(Place, order_by="name", **where)]
+        self.assertEqual(names(amenity_ids__all=[wifi.id, pool.id]),
+                         ["0", "2", "4"])
+        self.assertEqual(names(amenity_ids__any=[pool.id, sauna.id]),
+                         ["0", "1", "2", "4"])
+        self.assertEqual(names(amenity_ids__all=[wifi.id],
+                               amenity_ids__any=[pool.id],
+                               name__ne="2"), ["0", "4"])
+        self.assertEqual(places[0].amenities, [pool, wifi])
+        storage.delete(places[0])
+        places[3].amenities = pool
+        storage.new(Place(name="6", amenity_ids=[pool.id, wifi.id]))
+        self.assertEqual(names(amenity_ids__all=[pool.id, wifi.id]),
+                         ["2", "3", "4", "6"])
+        self.assertEqual(names(amenity_ids__all=[sauna.id, wifi.id]), [])
+        self.assertEqual(names(amenity_ids__any=["missing"]), [])
+        self.assertEqual(len(names(amenity_ids__all=[])), 6)
+        self.assertEqual(Place().amenity_ids, [])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_amenities_changed_in_place(self):
+        """Test that amenity filters and facets follow the amenity lists
+        changed in place"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        place = Place(name="Home", amenity_ids=[])
+        storage.new(place)
+        self.assertEqual(storage.query(Place, amenity_ids__all=["wifi"]), [])
+        self.assertEqual(storage.facets(Place)["amenity_ids"], {})
+        place.amenity_ids.append("wifi")
+        self.assertEqual(storage.query(Place, amenity_ids__all=["wifi"]),
+                         [place])
+        self.assertEqual(storage.facets(Place)["amenity_ids"], {"wifi": 1})
+        place.amenity_ids.remove("wifi")
+        self.assertEqual(storage.query(Place, amenity_ids__any=["wifi"]), [])
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                place.amenity_ids += ["pool"]
+                self.assertEqual(storage.query(Place,
+                                               amenity_ids__all=["pool"]),
+                                 [place])
+                raise KeyError("undo")
+        self.assertEqual(place.amenity_ids, [])
+        self.assertEqual(storage.query(Place, amenity_ids__any=["pool"]), [])
+        place = Place.from_dict(place.to_dict())
+        FileStorage._FileStorage__objects = {"Place." + place.id: place}
+        place.amenity_ids.extend(["wifi", "pool"])
+        self.assertEqual(storage.query(Place, amenity_ids__all=["pool"]),
+                         [place])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_facets(self):
+        """Test that facet counts follow the changes and the filters"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        california, nevada = State(name="California"), State(name="Nevada")
+        sf = City(name="SF", state_id=california.id)
+        reno = City(name="Reno", state_id=nevada.id)
+        wifi = Amenity(name="Wifi")
+        places = [Place(name=str(i), city_id=sf.id, price_by_night=40 * i,
+                        amenity_ids=[wifi.id] if i % 2 else [])
+                  for i in range(6)]
+        places[5].city_id = reno.id
+        for obj in [california, nevada, sf, reno, wifi] + places:
+            storage.new(obj)
+        self.assertEqual(storage.facets(Place), {
+            "city_id": {sf.id: 5, reno.id: 1},
+            "state_id": {california.id: 5, nevada.id: 1},
+            "amenity_ids": {wifi.id: 3},
+            "price_by_night": {0: 2, 50: 1, 100: 2, 200: 1}})
+        facets = storage.facets("Place", state_id=california.id,
+                                amenity_ids__all=[wifi.id])
+        self.assertEqual(facets["state_id"], {california.id: 2,
+                                              nevada.id: 1})
+        self.assertEqual(facets["city_id"], {sf.id: 2})
+        self.assertEqual(facets["amenity_ids"], {wifi.id: 2})
+        self.assertEqual(facets["price_by_night"], {0: 1, 100: 1})
+        places[1].price_by_night = 500
+        places[2].city_id = reno.id
+        sf.state_id = nevada.id
+        storage.delete(places[3])
+        facets = storage.facets("Place", price_by_night__lt=200)
+        self.assertEqual(facets["city_id"], {sf.id: 2, reno.id: 1})
+        self.assertEqual(facets["state_id"], {nevada.id: 3})
+        self.assertEqual(facets["price_by_night"],
+                         {0: 1, 50: 1, 100: 1, 200: 1, 500: 1})
+        self.assertEqual(storage.facets(Place)["amenity_ids"], {wifi.id: 2})
+        self.assertEqual([place.name for place in storage.query(
+            Place, state_id=nevada.id, order_by="name")],
+            ["0", "1", "2", "4", "5"])
+        with self.assertRaises(ValueError):
+            storage.facets(State)
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(file_storage.columns.numpy is None, "needs numpy")
+    def test_columns(self):
+        """Test that the place columns follow the storage changes"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        california = State(name="California")
+        sf = City(name="SF", state_id=california.id)
+        la = City(name="LA", state_id=california.id)
+        places = [Place(name=str(i), city_id=sf.id, price_by_night=10 * i,
+                        max_guest=i) for i in range(5)]
+        for obj in [california, sf, la] + places:
+            storage.new(obj)
+        snapshot = storage.columns(Place)
+        self.assertIs(storage.columns("Place"), snapshot)
+        self.assertEqual(snapshot.group("state_id", "max_guest", "sum"),
+                         {california.id: 10.0})
+        places[1].city_id = la.id
+        places[2].price_by_night = 100
+        storage.delete(places[0])
+        storage.new(Place(name="5", city_id=la.id, price_by_night=5))
+        snapshot = storage.columns(Place)
+        self.assertEqual(len(snapshot), 5)
+        self.assertEqual(snapshot.group("city_id", "price_by_night", "max"),
+                         {sf.id: 100.0, la.id: 10.0})
+        nevada = State(name="Nevada")
+        storage.new(nevada)
+        la.state_id = nevada.id
+        self.assertEqual(storage.columns(Place).group("state_id"),
+                         {california.id: 3, nevada.id: 2})
+        self.assertEqual(len(snapshot.filter(price_by_night__gt=20)), 3)
+        with self.assertRaises(ValueError):
+            storage.columns(State)
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_near_within(self):
+        """Test that radius and box searches follow the places' moves"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        sf = Place(name="SF", latitude=37.77, longitude=-122.42)
+        oakland = Place(name="Oakland", latitude=37.80, longitude=-122.27)
+        la = Place(name="LA", latitude=34.05, longitude=-118.24)
+        for place in [sf, oakland, la]:
+            storage.new(place)
+        self.assertEqual(storage.near(Place, 37.79, -122.28, 50),
+                         [oakland, sf])
+        self.assertEqual(storage.within("Place", 33, -123, 38, -118),
+                         [la, oakland, sf])
+        la.latitude, la.longitude = 37.78, -122.29
+        storage.delete(sf)
+        self.assertEqual(storage.near(Place, 37.79, -122.28, 50),
+                         [oakland, la])
+        self.assertEqual(storage.near(State, 37.79, -122.28, 50), [])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_search(self):
+        """Test that full-text search ranks and follows the changes"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        loft = Place(name="Loft", description="A quiet loft with a pool")
+        villa = Place(name="Pool villa", description="Pool, pool, pool")
+        storage.new(loft)
+        storage.new(villa)
+        storage.new(Review(text="The pool was cold"))
+        self.assertEqual(storage.search(Place, "pool"), [villa, loft])
+        self.assertEqual(storage.search("Place", "Quiet", 1), [loft])
+        self.assertEqual(storage.search(State, "pool"), [])
+        loft.description = "A loft"
+        storage.delete(villa)
+        house = Place(name="House", description="A quiet house")
+        storage.new(house)
+        self.assertEqual(storage.search(Place, "quiet pool"), [house])
+        self.assertEqual(len(storage.search(Review, "cold")), 1)
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_batch(self):
+        """Test that a batch saves once, when it ends"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        storage.save()
+        with storage.batch():
+            state = State(name="California")
+            state.save()
+            with storage.batch():
+                City(name="Fremont", state_id=state.id).save()
+            with open("file.json", "r") as f:
+                self.assertEqual(json.load(f), {})
+        with open("file.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 2)
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_batch_rollback(self):
+        """Test that a batch that raises undoes its changes"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        storage.save()
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                state.name = "Nevada"
+                state.save()
+                storage.delete(city)
+                State(name="Oregon").save()
+                raise KeyError
+        self.assertEqual(storage.all(), {"State." + state.id: state,
+                                         "City." + city.id: city})
+        self.assertEqual(state.name, "California")
+        self.assertEqual(state.cities, [city])
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"],
+                             "California")
+        FileStorage._FileStorage__objects = save
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageJournal(unittest.TestCase):
+    """Test the journal mode of the FileStorage class"""
+    def setUp(self):
+        """Point the storage at an empty file in journal mode"""
+        self.saved = (FileStorage._FileStorage__objects,
+                      FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__journal,
+                      FileStorage._FileStorage__shards,
+                      FileStorage._FileStorage__lazy)
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__file_path = "test_journal.json"
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__shards = 0
+        FileStorage._FileStorage__lazy = False
+        FileStorage._FileStorage__journal_len = 0
+        FileStorage._FileStorage__pending = {}
+        self.storage = FileStorage()
+        self.storage.reload()
+        FileStorage._FileStorage__out_of_band = False
+
+    def tearDown(self):
+        """Restore the storage and remove the test files"""
+        (FileStorage._FileStorage__objects,
+         FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__journal,
+         FileStorage._FileStorage__shards,
+         FileStorage._FileStorage__lazy) = self.saved
+        FileStorage._FileStorage__journal_len = 0
+        FileStorage._FileStorage__pending = {}
+        for path in ["test_journal.json", "test_journal.json.journal",
+                     "test_journal.json.text"]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_appends(self):
+        """Test that save only appends the changed objects"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(city)
+        self.storage.delete(state)
+        self.storage.save()
+        self.assertFalse(os.path.exists("test_journal.json"))
+        with open("test_journal.json.journal") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["key"] for r in records],
+                         ["State." + state.id, "City." + city.id,
+                          "State." + state.id])
+        self.assertIsNone(records[2]["value"])
+
+    def test_save_appends_assigned_objects(self):
+        """Test that save appends the loaded objects whose attributes were
+        assigned, in a batch or not"""
+        state = State(name="California")
+        city = City(name="Fremont")
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        FileStorage._FileStorage__out_of_band = False
+        self.storage.get(State, state.id).name = "Nevada"
+        self.storage.save()
+        with self.storage.batch():
+            self.storage.get(City, city.id).name = "Reno"
+        self.assertFalse(os.path.exists("test_journal.json"))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).name, "Nevada")
+        self.assertEqual(self.storage.get(City, city.id).name, "Reno")
+
+    def test_save_appends_in_place_change(self):
+        """Test that save appends the loaded objects whose lists changed in
+        place"""
+        place = Place(name="Home", amenity_ids=["wifi"])
+        self.storage.new(place)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        FileStorage._FileStorage__out_of_band = False
+        self.storage.get(Place, place.id).amenity_ids.append("pool")
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(Place, place.id).amenity_ids,
+                         ["wifi", "pool"])
+
+    def test_reload_replays(self):
+        """Test that reload applies the journal on top of the file"""
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        self.storage.delete(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all()), ["State." + state.id])
+        self.assertEqual(self.storage.all()["State." + state.id].name,
+                         "California")
+
+    def test_compaction(self):
+        """Test that a long journal is folded back into the file"""
+        FileStorage._FileStorage__compact_min = 2
+        try:
+            for i in range(3):
+                self.storage.new(State(name=str(i)))
+                self.storage.save()
+        finally:
+            FileStorage._FileStorage__compact_min = 1000
+        with open("test_journal.json") as f:
+            self.assertEqual(len(json.load(f)), 3)
+        self.assertEqual(os.path.getsize("test_journal.json.journal"), 0)
+
+    def test_search_index_kept(self):
+        """Test that the text index is written with the file and read back
+        only while the file did not change"""
+        place = Place(name="Loft", description="A quiet loft")
+        self.storage.new(place)
+        self.assertEqual(self.storage.search(Place, "quiet"), [place])
+        self.storage.new(Place(name="Villa"))
+        FileStorage._FileStorage__out_of_band = True
+        self.storage.save()
+        with open("test_journal.json.text") as f:
+            self.assertEqual(len(json.load(f)["classes"]["Place"]), 2)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        texts = FileStorage._FileStorage__texts
+        self.assertEqual(len(texts["Place"]), 2)
+        self.assertEqual([obj.id for obj in
+                          self.storage.search(Place, "quiet")], [place.id])
+        with open("test_journal.json.text", "w") as f:
+            json.dump({"stamp": None, "classes": {}}, f)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(FileStorage._FileStorage__texts, {})
+        self.assertEqual(len(self.storage.search(Place, "villa")), 1)
+
+    def test_close_skips_unchanged_files(self):
+        """Test that close does not reload files that did not change"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.assertIs(self.storage.all()["State." + state.id], state)
+
+    def test_close_replays_new_records(self):
+        """Test that close only replays what was appended to the journal"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        city = City(name="Fremont", state_id=state.id)
+        with open("test_journal.json.journal", "a") as f:
+            f.write(json.dumps({"key": "City." + city.id,
+                                "value": city.to_dict()}) + "\n")
+        self.storage.close()
+        self.assertIs(self.storage.all()["State." + state.id], state)
+        self.assertEqual(self.storage.all()["City." + city.id].name,
+                         "Fremont")
+        self.assertEqual(state.cities[0].id, city.id)
+
+
+class TestFileStorageLazy(TestFileStorageJournal):
+    """Test the journal mode of the FileStorage class, with lazy reload"""
+    def setUp(self):
+        """Point the storage at an empty file in lazy journal mode"""
+        super().setUp()
+        FileStorage._FileStorage__lazy = True
+
+    def tearDown(self):
+        """Restore the storage and remove the test files"""
+        FileStorage._FileStorage__raw = {}
+        super().tearDown()
+
+    def test_reload_builds_used_classes_only(self):
+        """Test that reload only builds objects of the classes used"""
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertEqual(list(self.storage.all(State)),
+                         ["State." + state.id])
+        self.assertNotIn("City." + city.id,
+                         FileStorage._FileStorage__objects)
+        cities = self.storage.all(State)["State." + state.id].cities
+        self.assertEqual([c.name for c in cities], ["Fremont"])
+
+    def test_get_builds_one_object(self):
+        """Test that get and count leave the other records unbuilt"""
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count(City), 1)
+        self.assertEqual(self.storage.get(State, state.id).name, "California")
+        self.assertEqual(list(FileStorage._FileStorage__objects),
+                         ["State." + state.id])
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_delete_builds_one_object(self):
+        """Test that delete leaves the other records of the class unbuilt"""
+        states = [State(name="California"), State(name="Nevada")]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.storage.delete(states[0])
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertEqual(self.storage.count(State), 1)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual([state.id for state in
+                          self.storage.all(State).values()], [states[1].id])
+
+    def test_replaced_objects_drop_records(self):
+        """Test that the unbuilt records go away with the __objects they
+        were reloaded for"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        FileStorage._FileStorage__objects = {}
+        city = City(name="Fremont")
+        self.storage.new(city)
+        self.assertEqual(self.storage.count(), 1)
+        self.assertIsNone(self.storage.get(State, state.id))
+        FileStorage._FileStorage__journal = False
+        self.storage.save()
+        with open("test_journal.json") as f:
+            self.assertEqual(list(json.load(f)), ["City." + city.id])
+
+    def test_save_keeps_unbuilt_records(self):
+        """Test that save writes back records that were never built"""
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.storage.all(State)["State." + state.id].name = "Nevada"
+        FileStorage._FileStorage__journal = False
+        self.storage.save()
+        with open("test_journal.json") as f:
+            stored = json.load(f)
+        self.assertEqual(stored["State." + state.id]["name"], "Nevada")
+        self.assertEqual(stored["City." + city.id]["name"], "Fremont")
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageShards(unittest.TestCase):
+    """Test the sharded layout of the FileStorage class"""
+    def setUp(self):
+        """Point the storage at an empty file split in two shards"""
+        self.saved = (FileStorage._FileStorage__objects,
+                      FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__journal,
+                      FileStorage._FileStorage__shards,
+                      FileStorage._FileStorage__lazy)
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__file_path = "test_shards.json"
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__shards = 2
+        FileStorage._FileStorage__lazy = False
+        self.storage = FileStorage()
+        self.storage.reload()
+        self.state = State(name="California")
+        self.city = City(name="Fremont", state_id=self.state.id)
+        self.storage.new(self.state)
+        self.storage.new(self.city)
+
+    def tearDown(self):
+        """Restore the storage and remove the test files"""
+        (FileStorage._FileStorage__objects,
+         FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__journal,
+         FileStorage._FileStorage__shards,
+         FileStorage._FileStorage__lazy) = self.saved
+        FileStorage._FileStorage__dirty_shards = set()
+        if os.path.exists("test_shards.json"):
+            os.remove("test_shards.json")
+        shutil.rmtree("test_shards.json.d", ignore_errors=True)
+
+    def shard(self, cls):
+        """returns the path of the only shard file of cls"""
+        [name] = [name for name in os.listdir("test_shards.json.d")
+                  if name.startswith(cls + ".")]
+        return os.path.join("test_shards.json.d", name)
+
+    def test_save_writes_shards(self):
+        """Test that save writes one file per class and bucket"""
+        self.storage.save()
+        self.assertFalse(os.path.exists("test_shards.json"))
+        with open(self.shard("State")) as f:
+            self.assertEqual(list(json.load(f)), ["State." + self.state.id])
+        with open(self.shard("City")) as f:
+            self.assertEqual(list(json.load(f)), ["City." + self.city.id])
+
+    def test_save_rewrites_dirty_shards(self):
+        """Test that save leaves the shards that did not change alone"""
+        self.storage.save()
+        city_inode = os.stat(self.shard("City")).st_ino
+        state_inode = os.stat(self.shard("State")).st_ino
+        self.state.name = "Nevada"
+        self.storage.save()
+        self.assertEqual(os.stat(self.shard("City")).st_ino, city_inode)
+        self.assertNotEqual(os.stat(self.shard("State")).st_ino, state_inode)
+        with open(self.shard("State")) as f:
+            self.assertEqual(json.load(f)["State." + self.state.id]["name"],
+                             "Nevada")
+
+    def test_migrates_single_file(self):
+        """Test that the single file is split into shards on save"""
+        FileStorage._FileStorage__shards = 0
+        self.storage.save()
+        FileStorage._FileStorage__shards = 2
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(len(self.storage.all()), 2)
+        self.storage.save()
+        self.assertTrue(os.path.isdir("test_shards.json.d"))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.all(City)["City." + self.city.id].name,
+                         "Fremont")
+
+    def test_migration_removes_single_file(self):
+        """Test that the single file goes away once split into shards, and
+        the shards once merged back into it"""
+        FileStorage._FileStorage__shards = 0
+        self.storage.save()
+        FileStorage._FileStorage__shards = 2
+        self.storage.save()
+        self.assertFalse(os.path.exists("test_shards.json"))
+        other = State(name="Nevada")
+        self.storage.new(other)
+        self.storage.save()
+        FileStorage._FileStorage__shards = 0
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.count(State), 2)
+        self.storage.save()
+        self.assertFalse(os.path.exists("test_shards.json.d"))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, other.id).name, "Nevada")
+
+    def test_shard_count_change(self):
+        """Test that changing the number of buckets moves the objects to
+        their new shards"""
+        states = [self.state]
+        while zlib.crc32(states[-1].id.encode()) % 4 < 2:
+            states.append(State(name="Nevada"))
+            self.storage.new(states[-1])
+        self.storage.save()
+        FileStorage._FileStorage__shards = 4
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.storage.delete(self.storage.get(State, states[-1].id))
+        self.storage.save()
+        names = set(key.split(".")[0] + "." +
+                    str(zlib.crc32(key.split(".")[1].encode()) % 4)
+                    for key in self.storage.all())
+        self.assertEqual(set(os.listdir("test_shards.json.d")),
+                         names | set([".shards"]))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.count(State), len(states) - 1)
+        self.assertIsNone(self.storage.get(State, states[-1].id))
+
+    def test_reload_reads_changed_shards(self):
+        """Test that reload only reads the shards that changed"""
+        self.storage.save()
+        other = City(name="Oakland", state_id=self.state.id)
+        with open(self.shard("City"), "w") as f:
+            json.dump({"City." + other.id: other.to_dict()}, f)
+        self.storage.close()
+        self.assertIs(self.storage.all()["State." + self.state.id],
+                      self.state)
+        self.assertEqual(sorted(c.name for c in self.state.cities),
+                         ["Fremont", "Oakland"])
+
+    def test_read_shard(self):
+        """Test that the grouped records workers send back unpack to the
+        records of the shard"""
+        self.storage.save()
+        path = self.shard("State")
+        self.assertEqual(list(file_storage.unpack(
+            file_storage.read_shard(path))),
+            list(file_storage.read_records(path)))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_reload_parallel(self):
+        """Test that reload loads the shards in worker processes"""
+        self.storage.save()
+        FileStorage._FileStorage__workers = 2
+        FileStorage._FileStorage__parallel_min = 0
+        try:
+            FileStorage._FileStorage__objects = {}
+            FileStorage._FileStorage__shard_stamps = {}
+            self.storage.reload()
+        finally:
+            FileStorage._FileStorage__workers = 0
+            FileStorage._FileStorage__parallel_min = 4 * 1024 * 1024
+        self.assertEqual(self.storage.all(City)["City." + self.city.id].name,
+                         "Fremont")
+        self.assertEqual([city.id for city in
+                          self.storage.children(City, "state_id",
+                                                self.state.id)],
+                         [self.city.id])
+
+    def test_reload_serial_after_initial_load(self):
+        """Test that only the initial load forks worker processes"""
+        self.storage.save()
+        other = City(name="Oakland", state_id=self.state.id)
+        with open(self.shard("City"), "w") as f:
+            json.dump({"City." + other.id: other.to_dict()}, f)
+        with open(self.shard("State"), "w") as f:
+            json.dump({"State." + self.state.id: self.state.to_dict()}, f)
+        FileStorage._FileStorage__workers = 2
+        FileStorage._FileStorage__parallel_min = 0
+        try:
+            with mock.patch("os.fork", side_effect=AssertionError):
+                self.storage.reload()
+        finally:
+            FileStorage._FileStorage__workers = 0
+            FileStorage._FileStorage__parallel_min = 4 * 1024 * 1024
+        self.assertEqual(self.storage.get(City, other.id).name, "Oakland")
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""
+Contains the TestFiltersDocs and TestFilters classes
+"""
+
+import inspect
+from models.engine import filters
+from models.place import Place
+from models.state import State
+import pep8
+import unittest
+
+
+class TestFiltersDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the filters module"""
+    def test_pep8_conformance_filters(self):
+        """Test that models/engine/filters.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/filters.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_filters(self):
+        """Test tests/test_models/test_engine/test_filters.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_filters.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_filters_module_docstring(self):
+        """Test for the filters.py module docstring"""
+        self.assertIsNot(filters.__doc__, None,
+                         "filters.py needs a docstring")
+        self.assertTrue(len(filters.__doc__) >= 1,
+                        "filters.py needs a docstring")
+
+    def test_filters_func_docstrings(self):
+        """Test for the presence of docstrings in filters functions"""
+        for func in inspect.getmembers(filters, inspect.isfunction):
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+class TestFilters(unittest.TestCase):
+    """Test the filters module"""
+    def setUp(self):
+        """Make a few states to filter"""
+        self.states = [State(name=name) for name in
+                       ["Oregon", "Alaska", "Texas"]]
+
+    def names(self, objs):
+        """returns the names of objs"""
+        return [getattr(obj, "name", None) for obj in objs]
+
+    def test_parse(self):
+        """Test that parse splits the operator off the filter names"""
+        self.assertEqual(filters.parse({"name": "a", "name__gte": "b"}),
+                         [("name", "eq", "a"), ("name", "gte", "b")])
+        with self.assertRaises(ValueError):
+            filters.parse({"name__like": "a"})
+
+    def test_matches(self):
+        """Test that matches applies every filter"""
+        triples = filters.parse({"name__gt": "B", "name__ne": "Texas"})
+        self.assertEqual(self.names(s for s in self.states
+                                    if filters.matches(s, triples)),
+                         ["Oregon"])
+        triples = filters.parse({"name__in": ["Alaska", "Texas"]})
+        self.assertEqual(self.names(s for s in self.states
+                                    if filters.matches(s, triples)),
+                         ["Alaska", "Texas"])
+
+    def test_matches_lists(self):
+        """Test that all and any look into list attributes"""
+        place = Place(amenity_ids=["wifi", "pool"])
+        self.assertTrue(filters.matches(place, filters.parse(
+            {"amenity_ids__all": ["pool", "wifi"]})))
+        self.assertFalse(filters.matches(place, filters.parse(
+            {"amenity_ids__all": ["pool", "sauna"]})))
+        self.assertTrue(filters.matches(place, filters.parse(
+            {"amenity_ids__any": ["pool", "sauna"]})))
+        self.assertFalse(filters.matches(object(), filters.parse(
+            {"amenity_ids__any": ["pool"]})))
+
+    def test_matches_missing(self):
+        """Test that range filters skip objects without the attribute"""
+        triples = filters.parse({"name__lt": "Z"})
+        self.assertFalse(filters.matches(object(), triples))
+        triples = filters.parse({"name": None})
+        self.assertTrue(filters.matches(object(), triples))
+
+    def test_page(self):
+        """Test that page sorts and slices"""
+        self.assertEqual(self.names(filters.page(self.states + [object()],
+                                                 "name")),
+                         ["Alaska", "Oregon", "Texas", None])
+        self.assertEqual(self.names(filters.page(self.states, "-name",
+                                                 limit=2)),
+                         ["Texas", "Oregon"])
+        self.assertEqual(self.names(filters.page(self.states, "name", 1, 2)),
+                         ["Oregon", "Texas"])
+        self.assertEqual(filters.page(self.states, offset=2), self.states[2:])
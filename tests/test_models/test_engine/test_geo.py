@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""
+Contains the TestGeoDocs and TestGeo classes
+"""
+
+import inspect
+from models.engine import geo
+import pep8
+import random
+import unittest
+
+
+class TestGeoDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the geo module"""
+    def test_pep8_conformance_geo(self):
+        """Test that models/engine/geo.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/geo.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_geo(self):
+        """Test tests/test_models/test_engine/test_geo.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_geo.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_geo_module_docstring(self):
+        """Test for the geo.py module docstring"""
+        self.assertIsNot(geo.__doc__, None,
+                         "geo.py needs a docstring")
+        self.assertTrue(len(geo.__doc__) >= 1,
+                        "geo.py needs a docstring")
+
+    def test_geo_func_docstrings(self):
+        """Test for the presence of docstrings in geo functions"""
+        funcs = inspect.getmembers(geo, inspect.isfunction) + \
+            inspect.getmembers(geo.Grid, inspect.isfunction)
+        for func in funcs:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+class TestGeo(unittest.TestCase):
+    """Test the geo module"""
+    def setUp(self):
+        """Scatter points over the globe, packed around a few cities"""
+        rand = random.Random(1)
+        self.points = {}
+        for i in range(3000):
+            lat, lon = rand.choice([(37.77, -122.42), (-17.7, 178.9),
+                                    (89.9, 0.0), (0.0, 0.0)])
+            self.points[str(i)] = (
+                max(-90, min(90, lat + rand.uniform(-2, 2))),
+                (lon + rand.uniform(-2, 2) + 180) % 360 - 180)
+        self.grid = geo.Grid()
+        for key, (lat, lon) in self.points.items():
+            self.grid.add(key, lat, lon)
+
+    def scan_near(self, lat, lon, km):
+        """returns what Grid.near should, from every point"""
+        return sorted((geo.haversine(lat, lon, plat, plon), key)
+                      for key, (plat, plon) in self.points.items()
+                      if geo.haversine(lat, lon, plat, plon) <= km)
+
+    def test_haversine(self):
+        """Test haversine against a known distance"""
+        self.assertAlmostEqual(geo.haversine(48.8566, 2.3522,
+                                             51.5074, -0.1278), 343.5, 0)
+        self.assertEqual(geo.haversine(10, 20, 10, 20), 0)
+        self.assertAlmostEqual(geo.haversine(0, 179.5, 0, -179.5),
+                               geo.haversine(0, 0, 0, 1))
+
+    def test_near(self):
+        """Test that near finds what a full scan does, nearest first"""
+        for lat, lon, km in [(37.77, -122.42, 50), (-17.7, 179.9, 120),
+                             (-17.7, -179.9, 300), (89.5, 120, 200),
+                             (0, 0, 20000), (45, 45, 10)]:
+            with self.subTest(lat=lat, lon=lon, km=km):
+                self.assertEqual(self.grid.near(lat, lon, km),
+                                 self.scan_near(lat, lon, km))
+
+    def test_within(self):
+        """Test that within finds the points of the box, across the
+        antimeridian too"""
+        for box in [(36, -123, 38, -121), (-19, 178, -16, -179),
+                    (-90, -180, 90, 180)]:
+            with self.subTest(box=box):
+                keys = [key for distance, key in self.grid.within(*box)]
+                self.assertCountEqual(keys, [
+                    key for key, (lat, lon) in self.points.items()
+                    if geo.in_box(lat, lon, *box)])
+                distances = [d for d, key in self.grid.within(*box)]
+                self.assertEqual(distances, sorted(distances))
+
+    def test_remove(self):
+        """Test that moved and removed points are not found again"""
+        self.grid.add("0", 10.0, 10.0)
+        self.grid.remove("1")
+        found = [key for distance, key in self.grid.near(10, 10, 1)]
+        self.assertEqual(found, ["0"])
+        self.assertEqual(len(self.grid), len(self.points) - 1)
+        self.assertNotIn("1", [key for d, key in
+                               self.grid.within(-90, -180, 90, 180)])
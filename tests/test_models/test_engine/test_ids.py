@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""
+Contains the TestIdsDocs and TestIds classes
+"""
+
+import inspect
+from models.base_model import BaseModel
+from models.engine import ids
+import pep8
+import unittest
+import uuid
+
+
+class TestIdsDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the ids module"""
+    def test_pep8_conformance_ids(self):
+        """Test that models/engine/ids.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/ids.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_ids(self):
+        """Test tests/test_models/test_engine/test_ids.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_ids.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_ids_module_docstring(self):
+        """Test for the ids.py module docstring"""
+        self.assertIsNot(ids.__doc__, None,
+                         "ids.py needs a docstring")
+        self.assertTrue(len(ids.__doc__) >= 1,
+                        "ids.py needs a docstring")
+
+    def test_ids_func_docstrings(self):
+        """Test for the presence of docstrings in ids functions"""
+        funcs = inspect.getmembers(ids, inspect.isfunction)
+        funcs += [(name, func) for name, func in
+                  vars(ids.BinaryUUID).items() if inspect.isfunction(func)]
+        for func in funcs:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+class TestIds(unittest.TestCase):
+    """Test the ids module"""
+    def tearDown(self):
+        """Go back to the default generator"""
+        ids.use("uuid4")
+
+    def test_uuid7(self):
+        """Test that uuid7 makes distinct version 7 UUIDs in order"""
+        made = [ids.uuid7() for i in range(10000)]
+        self.assertEqual(made, sorted(made))
+        self.assertEqual(len(set(made)), len(made))
+        for value in made[:10]:
+            self.assertEqual(uuid.UUID(value).version, 7)
+            self.assertEqual(uuid.UUID(value).variant, uuid.RFC_4122)
+            self.assertEqual(str(uuid.UUID(value)), value)
+
+    def test_use(self):
+        """Test that new instances take their ids from the chosen
+        generator"""
+        ids.use("uuid7")
+        first, second = BaseModel(), BaseModel()
+        self.assertEqual(uuid.UUID(first.id).version, 7)
+        self.assertLess(first.id, second.id)
+        ids.use(lambda: "fixed")
+        self.assertEqual(BaseModel().id, "fixed")
+        ids.use("uuid4")
+        self.assertEqual(uuid.UUID(BaseModel().id).version, 4)
+        with self.assertRaises(ValueError):
+            ids.use("serial")
+
+    def test_binary_uuid(self):
+        """Test that BinaryUUID keeps UUID strings as their 16 bytes"""
+        column = ids.BinaryUUID()
+        value = ids.uuid7()
+        data = column.process_bind_param(value, None)
+        self.assertEqual(data, uuid.UUID(value).bytes)
+        self.assertEqual(column.process_result_value(data, None), value)
+        self.assertIsNone(column.process_bind_param(None, None))
+        self.assertIsNone(column.process_result_value(None, None))
+        with self.assertRaises(ValueError):
+            column.process_bind_param("1234", None)
+        self.assertTrue(ids.is_uuid(value))
+        self.assertFalse(ids.is_uuid("1234"))
+        self.assertFalse(ids.is_uuid(None))
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""
+Contains the TestStreamDocs and TestStream classes
+"""
+
+import inspect
+import io
+import json
+from models.engine import stream
+import pep8
+import tracemalloc
+import unittest
+
+
+class TestStreamDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the stream module"""
+    def test_pep8_conformance_stream(self):
+        """Test that models/engine/stream.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/stream.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_stream(self):
+        """Test tests/test_models/test_engine/test_stream.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_stream.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_stream_module_docstring(self):
+        """Test for the stream.py module docstring"""
+        self.assertIsNot(stream.__doc__, None,
+                         "stream.py needs a docstring")
+        self.assertTrue(len(stream.__doc__) >= 1,
+                        "stream.py needs a docstring")
+
+    def test_stream_func_docstrings(self):
+        """Test for the presence of docstrings in stream functions"""
+        for func in inspect.getmembers(stream, inspect.isfunction):
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+class TestStream(unittest.TestCase):
+    """Test the stream module"""
+    records = {"State.1": {"name": "California", "id": "1"},
+               "City.2": {"name": "San \"Jose\"", "tags": [1, 2.5, None]},
+               "Place.3": {"max_guest": 12345, "description": "}{,:"}}
+
+    def test_read_records(self):
+        """Test that read_records yields every pair, whatever the chunks"""
+        for text in [json.dumps(self.records),
+                     json.dumps(self.records, indent=4), "{}", " { } "]:
+            for size in [1, 2, 7, 4096]:
+                with self.subTest(text=text[:20], size=size):
+                    pairs = stream.read_records(io.StringIO(text), size)
+                    self.assertEqual(dict(pairs), json.loads(text))
+
+    def test_read_records_invalid(self):
+        """Test that read_records raises ValueError on broken files"""
+        for text in ["", "[]", '{"a": 1', '{"a" 1}', '{"a": 1 "b": 2}']:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(stream.read_records(io.StringIO(text), 2))
+
+    def test_write_records(self):
+        """Test that write_records writes what json.dump would"""
+        f = io.StringIO()
+        stream.write_records(f, ((key, json.dumps(value)) for key, value
+                                 in self.records.items()))
+        self.assertEqual(f.getvalue(), json.dumps(self.records))
+
+    def test_read_records_memory(self):
+        """Test that reading a large file only holds a few chunks"""
+        text = json.dumps({"Review.{}".format(i): {"text": "x" * 100}
+                           for i in range(20000)})
+        f = io.StringIO(text)
+        tracemalloc.start()
+        for pair in stream.read_records(f, 4096):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, 64 * 1024)
+        self.assertGreater(len(text), 40 * peak)
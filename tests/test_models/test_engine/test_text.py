@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Contains the TestTextDocs and TestText classes
+"""
+
+import inspect
+import json
+from models.engine import text
+import pep8
+import unittest
+
+
+class TestTextDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the text module"""
+    def test_pep8_conformance_text(self):
+        """Test that models/engine/text.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/text.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_text(self):
+        """Test tests/test_models/test_engine/test_text.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_text.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_text_module_docstring(self):
+        """Test for the text.py module docstring"""
+        self.assertIsNot(text.__doc__, None,
+                         "text.py needs a docstring")
+        self.assertTrue(len(text.__doc__) >= 1,
+                        "text.py needs a docstring")
+
+    def test_text_func_docstrings(self):
+        """Test for the presence of docstrings in text functions"""
+        funcs = inspect.getmembers(text, inspect.isfunction) + \
+            inspect.getmembers(text.TextIndex, inspect.isfunction)
+        for func in funcs:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+class TestText(unittest.TestCase):
+    """Test the text module"""
+    def setUp(self):
+        """Index a few documents"""
+        self.index = text.TextIndex()
+        self.index.add("1", "Pool, pool and more POOL")
+        self.index.add("2", "A quiet flat with a pool<BR />and a garden")
+        self.index.add("3", "A quiet garden")
+
+    def test_tokenize(self):
+        """Test that tokenize lowercases and drops punctuation and tags"""
+        self.assertEqual(text.tokenize("Big <b>pool</b>, near_the Café!"),
+                         ["big", "pool", "near", "the", "café"])
+
+    def test_search(self):
+        """Test that search ranks by BM25"""
+        self.assertEqual([key for score, key in self.index.search("pool")],
+                         ["1", "2"])
+        self.assertEqual([key for score, key in
+                          self.index.search("quiet garden")], ["3", "2"])
+        self.assertEqual(self.index.search("garden", 1)[0][1], "3")
+        self.assertEqual(self.index.search("sauna"), [])
+
+    def test_add_remove(self):
+        """Test that documents can be replaced and removed"""
+        self.assertFalse(self.index.add("3", "a QUIET garden"))
+        self.assertTrue(self.index.add("3", "a pool"))
+        self.index.remove("1")
+        self.assertEqual([key for score, key in self.index.search("pool")],
+                         ["3", "2"])
+        self.assertEqual([key for score, key in self.index.search("garden")],
+                         ["2"])
+        self.assertNotIn("more", self.index.postings)
+        self.assertEqual(len(self.index), 2)
+
+    def test_dump_load(self):
+        """Test that a dumped index loads back the same"""
+        loaded = text.TextIndex.load(json.loads(json.dumps(
+            self.index.dump())))
+        self.assertEqual(loaded.docs, self.index.docs)
+        self.assertEqual(loaded.postings, self.index.postings)
+        self.assertEqual(loaded.search("quiet pool"),
+                         self.index.search("quiet pool"))
@@ -12,10 +12,11 @@ app = Flask(__name__)
 @app.route('/hbnb_filters', strict_slashes=False)
 def filters():
     """display a HTML page like 6-index.html from static"""
-    states = storage.all("State").values()
-    amenities = storage.all("Amenity").values()
+    states = storage.query("State", order_by="name")
+    amenities = storage.query("Amenity", order_by="name")
+    facets = storage.facets("Place")
     return render_template('10-hbnb_filters.html', states=states,
-                           amenities=amenities)
+                           amenities=amenities, facets=facets)
 
 
 @app.teardown_appcontext
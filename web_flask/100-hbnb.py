@@ -2,23 +2,50 @@
 """Starts Flask web application.
 The application listens on 0.0.0.0, port 5000.
 Routes:
-    /hbnb: HBnB home page.
+    /hbnb: HBnB home page, listing the places matching the price_min,
+        price_max, guests, rooms and bathrooms query arguments, in one of
+        the states or cities whose ids are given as states or cities
+        arguments, and having every amenity whose id is given as an
+        amenities argument; the filters show how many places each choice
+        leaves.
 """
 from models import storage
 from flask import Flask
 from flask import render_template
+from flask import request
 
 app = Flask(__name__)
 
+# search arguments -> the Place filters they stand for; list arguments
+# are given once per value
+search = {"price_min": "price_by_night__gte",
+          "price_max": "price_by_night__lte",
+          "guests": "max_guest__gte",
+          "rooms": "number_rooms__gte",
+          "bathrooms": "number_bathrooms__gte"}
+lists = {"states": "state_id__in",
+         "cities": "city_id__in",
+         "amenities": "amenity_ids__all"}
+
 
 @app.route("/hbnb", strict_slashes=False)
 def hbnb():
     """Displays the main HBnB filters HTML page."""
-    states = storage.all("State")
-    amenities = storage.all("Amenity")
-    places = storage.all("Place")
+    states = storage.query("State", order_by="name")
+    amenities = storage.query("Amenity", order_by="name")
+    where = {}
+    for arg, name in search.items():
+        value = request.args.get(arg, type=int)
+        if value is not None:
+            where[name] = value
+    for arg, name in lists.items():
+        if request.args.getlist(arg):
+            where[name] = request.args.getlist(arg)
+    places = storage.query("Place", order_by="name", **where)
+    facets = storage.facets("Place", **where)
     return render_template("100-hbnb.html",
-                           states=states, amenities=amenities, places=places)
+                           states=states, amenities=amenities, places=places,
+                           facets=facets)
 
 
 @app.teardown_appcontext
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+"""Starts Flask web application.
+The application listens on 0.0.0.0, port 5000.
+Routes:
+    /search: the places and reviews matching the words of the q query
+        argument, best match first.
+"""
+from models import storage
+from flask import Flask
+from flask import render_template
+from flask import request
+
+app = Flask(__name__)
+
+
+@app.route("/search", strict_slashes=False)
+def search():
+    """Displays the places and reviews matching the search."""
+    text = request.args.get("q", "")
+    limit = request.args.get("limit", 20, type=int)
+    places = storage.search("Place", text, limit)
+    reviews = storage.search("Review", text, limit)
+    return render_template("101-search.html", text=text, places=places,
+                           reviews=reviews)
+
+
+@app.teardown_appcontext
+def teardown(exc):
+    """Remove the current SQLAlchemy session."""
+    storage.close()
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0")
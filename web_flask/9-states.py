@@ -13,9 +13,12 @@ app = Flask(__name__)
 @app.route('/states/<state_id>', strict_slashes=False)
 def states(state_id=None):
     """display the states and cities listed in alphabetical order"""
-    states = storage.all("State")
     if state_id is not None:
-        state_id = 'State.' + state_id
+        state = storage.get("State", state_id)
+        cities = storage.query("City", state_id=state_id, order_by="name")
+        return render_template('9-states.html', state=state, cities=cities,
+                               state_id=state_id)
+    states = storage.query("State", order_by="name")
     return render_template('9-states.html', states=states, state_id=state_id)
 
 